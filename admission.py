@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import ADMISSION_REJECTIONS_TOTAL, ADMISSION_WAIT_SECONDS
+
+
+class Overloaded(Exception):
+    """A live scrape was refused; reason is 'queue_full', 'timeout' or 'stale'"""
+
+    def __init__(self, reason):
+        super().__init__(f"Live scrape rejected: {reason}")
+        self.reason = reason
+
+
+class UserRateLimiter:
+    """Per-user token buckets: `burst` requests at once, refilled at `rate` per second
+
+    Buckets of the least recently seen users are dropped beyond max_users;
+    a dropped user simply starts again with a full bucket.
+    """
+
+    def __init__(self, rate, burst, max_users=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = 0
+
+    def allow(self, user_id):
+        """Take one token for user_id; False when the user is over their rate"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(user_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+                self.allowed += 1
+            else:
+                self.throttled += 1
+            self._buckets[user_id] = (tokens, now)
+            while len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            ADMISSION_REJECTIONS_TOTAL.inc(reason="throttled")
+        return allowed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "throttled": self.throttled,
+                "tracked_users": len(self._buckets),
+            }
+
+
+class AdmissionControl:
+    """Bound concurrent live scrapes, with a bounded wait queue in front
+
+    At most max_concurrent callers hold a slot; up to max_waiting more wait
+    for one, each for at most wait_timeout seconds. Anyone beyond that is
+    refused immediately, so a burst turns into cheap "busy" replies instead
+    of more Chrome processes. run() can also take a deadline (e.g. when the
+    event's reply token runs out): callers past it are refused as 'stale'
+    and nobody waits beyond it.
+    """
+
+    def __init__(self, max_concurrent, max_waiting, wait_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.rejected_stale = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _acquire(self, deadline=None):
+        started = time.monotonic()
+        wait_timeout = self.wait_timeout
+        if deadline is not None:
+            wait_timeout = min(wait_timeout, deadline - time.time())
+        with self._cond:
+            if wait_timeout <= 0:
+                self.rejected_stale += 1
+                ADMISSION_REJECTIONS_TOTAL.inc(reason="stale")
+                raise Overloaded("stale")
+            if self._running >= self.max_concurrent:
+                if self._waiting >= self.max_waiting:
+                    self.rejected_queue_full += 1
+                    reason = "queue_full"
+                else:
+                    self._waiting += 1
+                    try:
+                        got_slot = self._cond.wait_for(
+                            lambda: self._running < self.max_concurrent, timeout=wait_timeout
+                        )
+                    finally:
+                        self._waiting -= 1
+                    reason = None if got_slot else "timeout"
+                    if reason:
+                        self.rejected_timeout += 1
+                if reason:
+                    ADMISSION_REJECTIONS_TOTAL.inc(reason=reason)
+                    raise Overloaded(reason)
+
+            self._running += 1
+            self.admitted += 1
+            waited = time.monotonic() - started
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        ADMISSION_WAIT_SECONDS.observe(waited)
+
+    def _release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify()
+
+    def run(self, fn, deadline=None):
+        """Call fn() once a slot is free (and before the time.time() deadline); raises Overloaded when refused"""
+        self._acquire(deadline)
+        try:
+            return fn()
+        finally:
+            self._release()
+
+    def in_flight(self):
+        with self._cond:
+            return self._running
+
+    def waiting(self):
+        with self._cond:
+            return self._waiting
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_waiting": self.max_waiting,
+                "in_flight": self._running,
+                "waiting": self._waiting,
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+                "rejected_stale": self.rejected_stale,
+                "wait_avg_ms": round(self._wait_total / self.admitted * 1000, 2) if self.admitted else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 2),
+            }
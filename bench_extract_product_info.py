@@ -0,0 +1,69 @@
+"""Compare WebDriver round trips and wall time of the two extract_product_info paths
+
+Usage: python bench_extract_product_info.py <product_id> [rounds]
+
+Loads the product page once, then runs the single-script extraction and the
+per-element fallback against it. Every WebDriver command goes through
+driver.execute, so wrapping it counts round trips exactly. Set KFC_BASE_URL
+to run against kfc_standin.py.
+"""
+import sys
+import time
+
+from scrap_detail import (
+    extract_product_info_in_page, extract_product_info_webdriver, product_url_for_id, setup_chrome_driver,
+    wait_for_page_load
+)
+
+
+def count_round_trips(driver):
+    """Wrap driver.execute; returns a dict whose 'count' grows with each command"""
+    counter = {"count": 0}
+    execute = driver.execute
+
+    def counted(*args, **kwargs):
+        counter["count"] += 1
+        return execute(*args, **kwargs)
+
+    driver.execute = counted
+    return counter
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    product_id = sys.argv[1]
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    driver = setup_chrome_driver(headless=True)
+    try:
+        driver.get(product_url_for_id(product_id))
+        wait_for_page_load(driver)
+        counter = count_round_trips(driver)
+
+        results = {}
+        # Both paths wait for the page the same way; time only the extraction itself
+        for label, func in (
+            ("webdriver (fallback)", extract_product_info_webdriver),
+            ("single script", extract_product_info_in_page),
+        ):
+            best = float("inf")
+            for _ in range(rounds):
+                counter["count"] = 0
+                started = time.perf_counter()
+                info = func(driver)
+                best = min(best, time.perf_counter() - started)
+            results[label] = (best, counter["count"], info)
+    finally:
+        driver.quit()
+
+    print(f"{'path':22} {'round trips':>12} {'best ms':>9}")
+    for label, (seconds, trips, _) in results.items():
+        print(f"{label:22} {trips:12} {seconds * 1000:9.1f}")
+
+    outputs = [info for _, _, info in results.values()]
+    print("✅ Same fields from both paths" if outputs[0] == outputs[1] else f"❌ Outputs differ: {outputs}")
+
+
+if __name__ == "__main__":
+    main()
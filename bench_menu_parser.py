@@ -0,0 +1,130 @@
+"""Compare the single-pass card parser with BeautifulSoup and check it against the saved page
+
+Usage: python bench_menu_parser.py [kfc_menu_page.html] [rounds]
+
+Besides timing, this is the regression check for menu_parser: the card
+records must match a BeautifulSoup walk of the same cards, ids must be
+unique, and every image must come from its own card. It also reports how
+many rows the old zip() of separate title and image lists got wrong.
+"""
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from menu_parser import MenuCard, parse_menu_cards, parse_menu_cards_file, parse_price, strip_query
+
+
+def parse_with_beautifulsoup(html):
+    """Card-level reference extraction with BeautifulSoup"""
+    soup = BeautifulSoup(html, 'html.parser')
+    cards = []
+    seen = set()
+    for card in soup.select("div.plp-item-card"):
+        header = card.select_one(".small-menu-product-header")
+        name = header.get_text(strip=True) if header else ""
+        card_id = card.get("id")
+        if not (card_id and name) or card_id in seen:
+            continue
+        seen.add(card_id)
+        image = card.select_one("img.small-menu-product-image")
+        ribbon = card.select_one(".discount-ribbon-text")
+        price = card.select_one(".Price-and-KJ-info")
+        ribbon_text = ribbon.get_text(" ", strip=True) if ribbon else ""
+        price_text = price.get_text(" ", strip=True) if price else ""
+        cards.append(MenuCard(
+            card_id,
+            name,
+            strip_query(image["src"]) if image and image.get("src") else "",
+            " | ".join(text for text in (ribbon_text, price_text) if text),
+            parse_price(price_text),
+        ))
+    return cards
+
+
+def parse_with_zip(html):
+    """The title/image pairing kfc.py, scrap_kfc.py and webhook.py used to do"""
+    soup = BeautifulSoup(html, 'html.parser')
+    menu_items = [div.get_text(strip=True) for div in soup.find_all("div", class_="small-menu-product-header")]
+    images = soup.find_all("img", class_="false small-menu-product-image")
+    image_urls = [strip_query(img.get("src")) for img in images if img.get("src")]
+    return list(zip(menu_items, image_urls))
+
+
+def measure(func, arg, rounds):
+    """Return (best seconds, peak traced bytes, result) for func(arg)"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def check_cards(cards, html):
+    """Return a list of problems with the parsed cards (empty when they look right)"""
+    problems = []
+    ids = [card.id for card in cards]
+    if len(ids) != len(set(ids)):
+        problems.append("duplicate card ids")
+    for card in cards:
+        if not card.name:
+            problems.append(f"{card.id}: empty name")
+        # The card's own markup must contain its image
+        if card.image_url:
+            start = html.find(f'id="{card.id}"')
+            end = html.find('class="plp-item-card', start + 1)
+            if card.image_url not in html[start:end if end != -1 else len(html)]:
+                problems.append(f"{card.id}: image belongs to another card")
+    return problems
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "kfc_menu_page.html"
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    print(f"📄 {path}: {len(html.encode('utf-8')) / 1024:.0f} KB, best of {rounds} rounds")
+
+    failed = False
+    baseline = None
+    for label, func, arg in (
+        ("BeautifulSoup (html.parser)", parse_with_beautifulsoup, html),
+        ("menu_parser.parse_menu_cards", parse_menu_cards, html),
+        ("menu_parser.parse_menu_cards_file", parse_menu_cards_file, path),
+    ):
+        seconds, peak, cards = measure(func, arg, rounds)
+        if baseline is None:
+            baseline = (seconds, cards)
+        elif cards != baseline[1]:
+            print(f"❌ {label} output differs from BeautifulSoup")
+            failed = True
+        with_images = sum(1 for card in cards if card.image_url)
+        print(f"{label:34} {seconds * 1000:8.1f} ms  {peak / 1024:8.0f} KB peak  "
+              f"x{baseline[0] / seconds:.1f}  ({len(cards)} cards, {with_images} with images)")
+
+    cards = parse_menu_cards(html)
+    problems = check_cards(cards, html)
+    for problem in problems:
+        print(f"❌ {problem}")
+    failed = failed or bool(problems)
+
+    image_by_name = {card.name: card.image_url for card in cards}
+    pairs = parse_with_zip(html)
+    wrong = sum(1 for name, image in pairs if image_by_name.get(name) != image)
+    print(f"ℹ️ Old zip() pairing: {len(pairs)} rows, {wrong} with another card's image")
+
+    if failed:
+        sys.exit(1)
+    print("✅ Card records match the reference extraction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Time filtered menu queries against the attribute index and check what they return
+
+Usage: python bench_menu_query.py [kfc_products.json] [rounds]
+
+Uses the crawled product store when it exists. Otherwise records are built
+from the cards in the saved kfc_menu_page.html (which has no prices), with
+made-up prices and combo badges so the price filters have something to do.
+Every query (parse_query + AttributeIndex.search) must stay under 1 ms.
+"""
+import os
+import random
+import sys
+import time
+
+from menu_attributes import AttributeIndex, parse_query
+from menu_parser import parse_menu_cards_file
+from product_store import ProductStore
+
+QUERIES = (
+    "buckets under 400",
+    "บักเก็ต ไม่เกิน 400",
+    "rice bowl",
+    "ข้าว ไม่เกิน 100",
+    "burger with fries",
+    "8 pcs",
+    "egg tart 6 ชิ้น",
+    "drinks 20-40 บาท",
+    "over 300",
+    "chicken rice",
+)
+
+BUDGET_SECONDS = 0.001
+
+
+def synthetic_records(path="kfc_menu_page.html", seed=1):
+    """Product records for the saved listing's cards, with deterministic fake prices and badges"""
+    rng = random.Random(seed)
+    records = []
+    seen = set()
+    for card in parse_menu_cards_file(path):
+        if card.id in seen:
+            continue
+        seen.add(card.id)
+        name = card.name.casefold()
+        badge = ""
+        if "bucket" in name:
+            badge = f"{rng.choice((6, 8, 10, 12))} PCS. Fried Chicken | French Fries | Pepsi"
+        elif "box" in name or "set" in name or "combo" in name:
+            badge = "Fried Chicken | French Fries (R) | Pepsi 1 Glass"
+        info = {"badge_text": badge, "price": f"฿ {rng.randrange(19, 700, 10)}", "description": ""}
+        records.append({"id": card.id, "name": card.name, "url": "", "info": info})
+    return records
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "kfc_products.json"
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    if os.path.exists(path):
+        records = ProductStore(path).records()
+        source = path
+    else:
+        records = synthetic_records()
+        source = "kfc_menu_page.html (synthetic prices)"
+
+    start = time.perf_counter()
+    index = AttributeIndex(records)
+    print(f"📦 {len(index)} products from {source}, indexed in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"   categories: {index.categories()}")
+
+    failed = False
+    for text in QUERIES:
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            query = parse_query(text)
+            entries = index.search(query, limit=10)
+            best = min(best, time.perf_counter() - start)
+        status = "✅" if best < BUDGET_SECONDS else "❌"
+        failed = failed or best >= BUDGET_SECONDS
+        shown = ", ".join(
+            f"{entry.record['name']} ({entry.attributes.price:,.0f})" if entry.attributes.price is not None
+            else entry.record["name"]
+            for entry in entries[:3]
+        )
+        print(f"{status} {text:22} {best * 1e6:7.1f} µs  {len(entries):2} results  {shown}")
+
+    if failed:
+        sys.exit(1)
+    print(f"✅ Every query answered in under {BUDGET_SECONDS * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Compare page weight and load time with and without resource blocking
+
+Usage: python bench_resource_blocking.py [product_id] [profile ...]
+
+Loads the menu page (and a product page if an id is given) once per profile
+and prints bytes transferred, request count and load time. Set KFC_BASE_URL
+to run against kfc_standin.py.
+"""
+import sys
+
+from scrap_detail import MENU_URL, RESOURCE_BLOCK_PROFILES, measure_page_load, product_url_for_id, setup_chrome_driver
+
+
+def main():
+    product_id = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] not in RESOURCE_BLOCK_PROFILES else None
+    profiles = [arg for arg in sys.argv[1:] if arg in RESOURCE_BLOCK_PROFILES] or ["none", "default"]
+
+    urls = [MENU_URL]
+    if product_id:
+        urls.append(product_url_for_id(product_id))
+
+    results = {}
+    for profile in profiles:
+        driver = setup_chrome_driver(headless=True, block_profile=profile)
+        try:
+            # Warm-up load so DNS/TLS setup doesn't favour whichever profile runs second
+            driver.get(MENU_URL)
+            for url in urls:
+                # Fresh cache each time so transferred bytes are comparable
+                driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                results[(profile, url)] = measure_page_load(driver, url)
+        finally:
+            driver.quit()
+
+    print(f"{'profile':10} {'KB':>9} {'requests':>9} {'load ms':>9}  url")
+    for url in urls:
+        baseline = results.get((profiles[0], url))
+        for profile in profiles:
+            r = results[(profile, url)]
+            saved = ""
+            if baseline and profile != profiles[0] and baseline["bytes"]:
+                saved = f"  ({100 - r['bytes'] * 100 / baseline['bytes']:.0f}% fewer bytes)"
+            print(f"{profile:10} {r['bytes'] / 1024:9.0f} {r['requests']:9} {r['load_ms'] or 0:9}  {url}{saved}")
+
+
+if __name__ == "__main__":
+    main()
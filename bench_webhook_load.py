@@ -0,0 +1,172 @@
+"""Load-test a webhook app end to end with signed synthetic LINE events
+
+    python bench_webhook_load.py --app webhook_kfc --requests 500 --concurrency 20 --menu-ratio 0.7
+
+The webhook runs in-process on a local port, its LINE replies go to
+line_standin.py and kfc.co.th is replaced by kfc_standin.py serving
+--pages (kfc_menu_page.html plus products/<id>.html). For each message type
+it reports throughput and p50/p95/p99 of the HTTP acknowledgement and of the
+time until the reply reached the LINE stand-in.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import importlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from kfc_standin import start_standin
+from line_standin import start_line_standin
+
+
+def sign(body, channel_secret):
+    """X-Line-Signature for a webhook body"""
+    digest = hmac.new(channel_secret.encode("utf-8"), body.encode("utf-8"), hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("utf-8")
+
+
+def make_text_event(text, user_id="U0000000000000000000000000000load"):
+    """A LINE text message event as the platform would deliver it"""
+    return {
+        "type": "message",
+        "mode": "active",
+        "timestamp": int(time.time() * 1000),
+        "source": {"type": "user", "userId": user_id},
+        "webhookEventId": uuid.uuid4().hex.upper(),
+        "deliveryContext": {"isRedelivery": False},
+        "replyToken": uuid.uuid4().hex,
+        "message": {"id": str(random.randrange(10 ** 17)), "type": "text", "quoteToken": uuid.uuid4().hex, "text": text},
+    }
+
+
+def make_body(events, destination="Uloadtestdestination"):
+    return json.dumps({"destination": destination, "events": events})
+
+
+def generate_messages(count, menu_ratio, product_names, seed=0):
+    """[(kind, text)] with roughly menu_ratio "menu" messages and the rest product names"""
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        if not product_names or rng.random() < menu_ratio:
+            messages.append(("menu", "menu"))
+        else:
+            messages.append(("detail", rng.choice(product_names)))
+    return messages
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def start_app(app):
+    """Serve a Flask app on a background thread; returns its base URL"""
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def run(args):
+    kfc_server, kfc_url = start_standin(args.pages)
+    line_server, line_url = start_line_standin(latency=args.line_latency)
+
+    # The webhook modules read these at import time. The event-dedup and detail
+    # caches go to a scratch directory so a run leaves the real ones alone.
+    scratch = tempfile.mkdtemp(prefix="kfc-load-")
+    os.environ["KFC_BASE_URL"] = kfc_url
+    os.environ["LINE_API_BASE_URL"] = line_url
+    os.environ["KFC_EVENT_DEDUP_PATH"] = os.path.join(scratch, "kfc_webhook_events.sqlite3")
+    os.environ["KFC_DETAIL_CACHE_PATH"] = os.path.join(scratch, "kfc_detail_cache.sqlite3")
+    webhook = importlib.import_module(args.app)
+    app_url = start_app(webhook.app)
+
+    product_names = []
+    if hasattr(webhook, "menu_catalog"):
+        product_names = [item.name for item in webhook.menu_catalog.items()]
+    messages = generate_messages(args.requests, args.menu_ratio, product_names, args.seed)
+
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+    sent = {}
+
+    def send(indexed_message):
+        index, (kind, text) = indexed_message
+        # Spread traffic over --users senders; webhook_kfc rate-limits live lookups per user
+        event = make_text_event(text, user_id=f"U{index % args.users:032x}")
+        body = make_body([event])
+        started = time.perf_counter()
+        sent_at = time.time()
+        response = session.post(app_url + "/", data=body, headers={
+            "Content-Type": "application/json",
+            "X-Line-Signature": sign(body, webhook.CHANNEL_SECRET),
+        })
+        ack = time.perf_counter() - started
+        sent[event["replyToken"]] = (kind, sent_at, ack, response.status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(send, enumerate(messages)))
+
+    # Replies are sent from worker threads; wait for them to arrive
+    deadline = time.time() + args.reply_timeout
+    while time.time() < deadline and len(line_server.replies) < len(sent):
+        time.sleep(0.05)
+    wall = time.perf_counter() - started
+
+    replied_at = {r["payload"]["replyToken"]: r["received_at"] for r in list(line_server.replies)}
+    report(sent, replied_at, wall)
+
+    kfc_server.shutdown()
+    line_server.shutdown()
+    shutil.rmtree(scratch, ignore_errors=True)
+
+
+def report(sent, replied_at, wall):
+    print(f"{'type':8} {'sent':>6} {'non-200':>8} {'replied':>8} {'ack p50/p95/p99 ms':>22} "
+          f"{'reply p50/p95/p99 ms':>24} {'replies/s':>10}")
+    for kind in sorted({entry[0] for entry in sent.values()}):
+        entries = [(token, entry) for token, entry in sent.items() if entry[0] == kind]
+        acks = [entry[2] * 1000 for _, entry in entries]
+        errors = sum(1 for _, entry in entries if entry[3] != 200)
+        replies = [(replied_at[token] - entry[1]) * 1000 for token, entry in entries if token in replied_at]
+        print(
+            f"{kind:8} {len(entries):6} {errors:8} {len(replies):8} "
+            f"{percentile(acks, 50):8.1f}/{percentile(acks, 95):.1f}/{percentile(acks, 99):.1f} "
+            f"{percentile(replies, 50):10.1f}/{percentile(replies, 95):.1f}/{percentile(replies, 99):.1f} "
+            f"{len(replies) / wall:10.1f}"
+        )
+    print(f"Total: {len(sent)} requests in {wall:.2f}s ({len(sent) / wall:.1f} req/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="webhook_kfc", help="webhook module to load (webhook_kfc or webhook)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--menu-ratio", type=float, default=0.7, help="share of 'menu' messages; the rest are product names")
+    parser.add_argument("--users", type=int, default=100, help="number of distinct LINE user ids sending messages")
+    parser.add_argument("--pages", default=".", help="directory with saved KFC pages for kfc_standin")
+    parser.add_argument("--line-latency", type=float, default=0.0, help="artificial LINE API latency in seconds")
+    parser.add_argument("--reply-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
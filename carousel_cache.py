@@ -0,0 +1,136 @@
+import json
+import re
+import threading
+
+from linebot.models import (
+    CarouselColumn, CarouselTemplate, MessageAction, PostbackAction,
+    QuickReply, QuickReplyButton, TemplateSendMessage,
+)
+
+# LINE carousels take at most 10 columns
+MENU_PAGE_SIZE = 10
+
+# LINE rejects the whole reply when an action label is longer than this
+MAX_LABEL_LENGTH = 20
+
+MENU_TEXT = re.compile(r"^\s*(?:menu|เมนู)(?:\s+(\d+))?\s*$", re.IGNORECASE)
+MENU_POSTBACK = re.compile(r"^menu_page=(\d+)$")
+
+
+def parse_menu_request(text):
+    """Return the 1-based page for "menu" / "menu 2" / "menu_page=2", else None"""
+    match = MENU_TEXT.match(text) or MENU_POSTBACK.match(text)
+    if not match:
+        return None
+    return int(match.group(1) or 1)
+
+
+class PrebuiltMessage:
+    """A send message serialized once and reused for every reply
+
+    LineBotApi only calls as_json_dict() on the messages it is given, so the
+    cached dict is sent as-is; json_text holds the same payload pre-encoded.
+    """
+
+    __slots__ = ("json_dict", "json_text")
+
+    def __init__(self, message):
+        self.json_dict = message.as_json_dict()
+        self.json_text = json.dumps(self.json_dict, ensure_ascii=False)
+
+    def as_json_dict(self):
+        return self.json_dict
+
+
+def build_menu_page(items, page, page_count, text="เมนูแนะนำจาก KFC 🍗", action=None):
+    """Build the carousel message for one page of menu items
+
+    action(item) gives each column's button; by default it sends the product
+    name back so the bot replies with its details.
+    """
+    columns = [
+        CarouselColumn(
+            thumbnail_image_url=item.thumbnail_url,
+            title=item.name[:40],
+            text=text,
+            actions=[action(item) if action else MessageAction(label="ดูรายละเอียด", text=item.name)]
+        )
+        for item in items
+    ]
+
+    quick_reply = None
+    if page < page_count:
+        quick_reply = QuickReply(items=[
+            QuickReplyButton(action=PostbackAction(
+                # Must stay within MAX_LABEL_LENGTH with three-digit page numbers too
+                label=f"ถัดไป ({page + 1}/{page_count})",
+                data=f"menu_page={page + 1}",
+                display_text=f"menu {page + 1}",
+            ))
+        ])
+
+    return TemplateSendMessage(
+        alt_text=f"KFC Menu ({page}/{page_count})",
+        template=CarouselTemplate(columns=columns),
+        quick_reply=quick_reply,
+    )
+
+
+def build_result_carousel(results, alt_text):
+    """Build a carousel from (name, thumbnail_url, text) tuples, e.g. filtered query results
+
+    LINE needs every column to have a thumbnail or none to, so images are left
+    out when any result lacks one.
+    """
+    with_images = all(thumbnail for _, thumbnail, _ in results)
+    columns = [
+        CarouselColumn(
+            thumbnail_image_url=thumbnail if with_images else None,
+            title=name[:40],
+            text=text[:60],
+            actions=[MessageAction(label="ดูรายละเอียด", text=name)]
+        )
+        for name, thumbnail, text in results[:MENU_PAGE_SIZE]
+    ]
+    return TemplateSendMessage(alt_text=alt_text[:400], template=CarouselTemplate(columns=columns))
+
+
+class CarouselCache:
+    """Menu carousel pages built once per MenuCatalog version
+
+    All pages are rendered and serialized the first time a version is asked
+    for; every later "menu N" reply is a tuple lookup.
+    """
+
+    def __init__(self, catalog, page_size=MENU_PAGE_SIZE):
+        self.catalog = catalog
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._cached = (None, ())
+
+    def _build(self, items):
+        chunks = [items[i:i + self.page_size] for i in range(0, len(items), self.page_size)]
+        return tuple(
+            PrebuiltMessage(build_menu_page(chunk, number, len(chunks)))
+            for number, chunk in enumerate(chunks, 1)
+        )
+
+    def pages(self):
+        """Return the prebuilt pages for the current catalog snapshot"""
+        snapshot = self.catalog.snapshot()
+        version, pages = self._cached
+        if version == snapshot.version:
+            return pages
+        with self._lock:
+            version, pages = self._cached
+            if version != snapshot.version:
+                pages = self._build(snapshot.items)
+                self._cached = (snapshot.version, pages)
+            return pages
+
+    def page(self, number):
+        """Return page `number` (1-based) or None if it is out of range"""
+        pages = self.pages()
+        if 1 <= number <= len(pages):
+            return pages[number - 1]
+        return None
@@ -0,0 +1,159 @@
+"""Crawl every menu category in parallel and write one merged catalog
+
+    python crawl_catalog.py [workers]
+
+Categories come from KFC_CATEGORIES (comma separated) and pages from
+KFC_BASE_URL, so the crawl can run against kfc_standin.py.
+"""
+import csv
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from lazy_scroll import scroll_until_loaded
+from menu_parser import strip_query
+from scrap_detail import KFC_BASE_URL, collect_product_cards, handle_cookie_popup, setup_chrome_driver
+from snapshot_archive import archive_page
+from thumbnails import add_thumbnails
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = [c.strip() for c in os.environ.get("KFC_CATEGORIES", "meals,buckets,drinks,desserts").split(",") if c.strip()]
+CRAWL_WORKERS = int(os.environ.get("KFC_CRAWL_WORKERS", "4"))
+CATALOG_CSV_PATH = "kfc_menu.csv"
+CATALOG_FIELDS = ["Menu Item", "Image URL", "Product ID", "Category", "Thumbnail URL", "Thumbnail File"]
+
+
+def category_url(category, base_url=KFC_BASE_URL):
+    return f"{base_url}/menu/{category}"
+
+
+def crawl_category(driver, category, base_url=KFC_BASE_URL):
+    """Load one category page, scroll until every card is in, and return its cards"""
+    started = time.perf_counter()
+    driver.get(category_url(category, base_url))
+    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.plp-item-card")))
+    scroll_until_loaded(driver)
+    archive_page(driver.current_url, driver.page_source, kind="category")
+
+    cards = collect_product_cards(driver)
+    for card in cards:
+        card["category"] = category
+    logger.info(f"Category '{category}': {len(cards)} cards in {time.perf_counter() - started:.1f}s")
+    return cards
+
+
+def merge_catalog(categories, results):
+    """Merge per-category cards into one list keyed by card id (first category wins)"""
+    catalog = {}
+    for category in categories:
+        for card in results.get(category, ()):
+            if card["id"] in catalog:
+                continue
+            catalog[card["id"]] = {
+                "id": card["id"],
+                "name": card["name"],
+                "image_url": strip_query(card["image"]) if card.get("image") else "",
+                "category": category,
+            }
+    return list(catalog.values())
+
+
+def crawl_catalog(categories=CATEGORIES, base_url=KFC_BASE_URL, workers=CRAWL_WORKERS, headless=True):
+    """Crawl all categories across at most `workers` browsers and merge the results
+
+    Each worker owns one browser and keeps taking categories off a shared
+    queue, so wall time is roughly categories / workers page crawls. A
+    category that fails, or a worker whose browser won't start, is logged and
+    the rest of the crawl carries on.
+    """
+    pending = queue.Queue()
+    for category in categories:
+        pending.put(category)
+    results = {}
+    errors = {}
+    results_lock = threading.Lock()
+
+    def work():
+        try:
+            driver = setup_chrome_driver(headless=headless)
+        except Exception as e:
+            # The other workers keep taking categories; any left over are reported below
+            logger.warning(f"Crawl worker could not start Chrome: {str(e)}")
+            return
+        cookies_handled = False
+        try:
+            while True:
+                try:
+                    category = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    if not cookies_handled:
+                        driver.get(category_url(category, base_url))
+                        handle_cookie_popup(driver)
+                        cookies_handled = True
+                    cards = crawl_category(driver, category, base_url)
+                except Exception as e:
+                    logger.warning(f"Failed to crawl category '{category}': {str(e)}")
+                    with results_lock:
+                        errors[category] = str(e)
+                    continue
+                with results_lock:
+                    results[category] = cards
+        finally:
+            driver.quit()
+
+    started = time.perf_counter()
+    pool_size = max(1, min(workers, len(categories)))
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        for future in [executor.submit(work) for _ in range(pool_size)]:
+            future.result()
+
+    for category in categories:
+        if category not in results:
+            reason = errors.get(category) or "no crawl worker could start Chrome"
+            logger.error(f"❌ Category '{category}' not crawled: {reason}")
+
+    products = merge_catalog(categories, results)
+    logger.info(
+        f"Crawled {len(results)}/{len(categories)} categories, {len(products)} unique products "
+        f"with {pool_size} workers in {time.perf_counter() - started:.1f}s"
+    )
+    return products
+
+
+def save_catalog_csv(products, path=CATALOG_CSV_PATH):
+    """Atomically write the merged catalog in the CSV layout MenuCatalog reads"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(CATALOG_FIELDS)
+        for product in products:
+            writer.writerow([
+                product["name"], product["image_url"], product["id"], product["category"],
+                product.get("thumbnail_url", ""), product.get("thumbnail_file", ""),
+            ])
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else CRAWL_WORKERS
+    products = crawl_catalog(workers=workers)
+    if not products:
+        # Every category failed or came back empty; an empty CSV would empty the webhooks' menu
+        logger.error(f"❌ No menu items crawled; leaving '{CATALOG_CSV_PATH}' unchanged")
+        sys.exit(1)
+    # Carousel-sized JPEG variants next to the originals (downloaded when KFC_THUMBNAIL_DIR is set)
+    add_thumbnails(products)
+    save_catalog_csv(products)
+    print(f"✅ Saved {len(products)} menu items to '{CATALOG_CSV_PATH}'")
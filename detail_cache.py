@@ -0,0 +1,164 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DETAIL_CACHE_PATH = os.environ.get("KFC_DETAIL_CACHE_PATH", "kfc_detail_cache.sqlite3")
+
+# Entries are fresh for DETAIL_CACHE_TTL seconds; after that they are served
+# stale while a background refresh runs, for at most DETAIL_CACHE_MAX_STALE.
+DETAIL_CACHE_TTL = int(os.environ.get("KFC_DETAIL_CACHE_TTL", str(6 * 3600)))
+DETAIL_CACHE_MAX_STALE = int(os.environ.get("KFC_DETAIL_CACHE_MAX_STALE", str(7 * 24 * 3600)))
+DETAIL_CACHE_LRU_SIZE = int(os.environ.get("KFC_DETAIL_CACHE_LRU_SIZE", "256"))
+
+
+class DetailCache:
+    """Two-tier TTL cache for formatted product details
+
+    An in-process LRU sits in front of a SQLite table that survives restarts.
+    Stale entries are returned immediately while one background refresh per
+    key runs; if loading fails (e.g. the KFC site is down) a stale entry is
+    served instead of the error. The SQLite connection is opened lazily in
+    each process, so a cache created before a pre-fork server forks is safe.
+    """
+
+    def __init__(self, path=DETAIL_CACHE_PATH, ttl=DETAIL_CACHE_TTL,
+                 max_stale=DETAIL_CACHE_MAX_STALE, lru_size=DETAIL_CACHE_LRU_SIZE):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.lru_size = lru_size
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+        self.path = path
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+
+        self._counts = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "stale_served": 0, "refreshes": 0, "refresh_failures": 0,
+        }
+
+    def _connection(self):
+        """This process's SQLite connection (call with _db_lock held)"""
+        if self._db_pid != os.getpid():
+            # Never reuse a connection inherited across fork()
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS details (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                return entry
+
+        with self._db_lock:
+            row = self._connection().execute("SELECT value, stored_at FROM details WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        entry = (row[0], row[1])
+        self._remember(key, entry)
+        self._count("disk_hits")
+        return entry
+
+    def put(self, key, value):
+        """Store a freshly loaded value in both tiers"""
+        entry = (value, time.time())
+        self._remember(key, entry)
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO details (key, value, stored_at) VALUES (?, ?, ?)", (key, *entry)
+            )
+            db.commit()
+
+    def _refresh(self, key, loader):
+        try:
+            self.put(key, loader())
+            self._count("refreshes")
+        except Exception as e:
+            self._count("refresh_failures")
+            logger.warning(f"Background refresh of '{key}' failed, keeping stale entry: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+
+    def peek(self, key):
+        """Return any servable cached value for key (fresh or stale) without loading, else None"""
+        entry = self._lookup(key)
+        if entry is not None and time.time() - entry[1] < self.ttl + self.max_stale:
+            return entry[0]
+        return None
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss
+
+        loader must raise on failure rather than return an error text, so that
+        failures are never cached.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.max_stale:
+                self._count("stale_served")
+                self._schedule_refresh(key, loader)
+                return value
+
+        self._count("misses")
+        try:
+            value = loader()
+        except Exception:
+            if entry is None:
+                raise
+            # Too old to serve by default, but better than an error while the site is down
+            self._count("stale_served")
+            self._count("refresh_failures")
+            logger.warning(f"Loading '{key}' failed, serving stale entry")
+            return entry[0]
+        self.put(key, value)
+        return value
+
+    def stats(self):
+        """Return hit/miss counters and ratios"""
+        with self._lock:
+            counts = dict(self._counts)
+            counts["memory_entries"] = len(self._lru)
+        lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+        counts["hit_ratio"] = round((lookups - counts["misses"]) / lookups, 3) if lookups else 0.0
+        counts["miss_ratio"] = round(counts["misses"] / lookups, 3) if lookups else 0.0
+        return counts
@@ -0,0 +1,170 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class PooledDriver:
+    """A pooled WebDriver plus the bookkeeping needed to recycle it"""
+
+    __slots__ = ("driver", "pages", "created_at")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+
+class DriverPool:
+    """Bounded pool of warm Chrome drivers parked on the menu page
+
+    create_driver() must return a new WebDriver already parked on the menu page
+    with the cookie popup accepted; park_driver(driver) navigates a used driver
+    back there. Drivers are recycled after max_pages checkouts or once the
+    page's JS heap grows past max_memory_mb.
+    """
+
+    def __init__(self, create_driver, park_driver, size=2, max_pages=50,
+                 max_memory_mb=512, checkout_timeout=30):
+        self.create_driver = create_driver
+        self.park_driver = park_driver
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.checkout_timeout = checkout_timeout
+
+        # LIFO so the most recently used (hottest) driver is handed out first
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self._closed = False
+
+    def _launch(self):
+        driver = self.create_driver()
+        logger.info("Launched pooled Chrome driver")
+        return PooledDriver(driver)
+
+    def _discard(self, entry, reason):
+        logger.info(f"Recycling pooled driver after {entry.pages} pages: {reason}")
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting pooled driver: {str(e)}")
+        with self._lock:
+            self._live -= 1
+
+    def _reserve_slot(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Driver pool is closed")
+            if self._live < self.size:
+                self._live += 1
+                return True
+        return False
+
+    def _new_entry(self):
+        try:
+            return self._launch()
+        except Exception:
+            with self._lock:
+                self._live -= 1
+            raise
+
+    def memory_mb(self, driver):
+        """Return the page's used JS heap in MB (raises if the driver is dead)"""
+        used = driver.execute_script(
+            "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0"
+        )
+        return (used or 0) / (1024 * 1024)
+
+    def _recycle_reason(self, entry):
+        if entry.pages >= self.max_pages:
+            return f"reached {self.max_pages} pages"
+        try:
+            memory = self.memory_mb(entry.driver)
+        except Exception as e:
+            return f"health check failed: {str(e)}"
+        if memory > self.max_memory_mb:
+            return f"JS heap {memory:.0f} MB over {self.max_memory_mb} MB limit"
+        return None
+
+    def warm_up(self):
+        """Launch drivers until the pool is full"""
+        while self._reserve_slot():
+            self._idle.put(self._new_entry())
+
+    def checkout(self, timeout=None):
+        """Take a healthy parked driver out of the pool"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve_slot():
+                    return self._new_entry()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No Chrome driver available within {timeout}s")
+                try:
+                    # Wait in short slices: a slot freed by a failed launch or a
+                    # discarded driver never shows up on the idle queue
+                    entry = self._idle.get(timeout=min(remaining, 0.5))
+                except queue.Empty:
+                    continue
+
+            reason = self._recycle_reason(entry)
+            if reason is None:
+                return entry
+            self._discard(entry, reason)
+
+    def checkin(self, entry):
+        """Return a driver; it is re-parked on the menu page in the background"""
+        entry.pages += 1
+        if self._closed:
+            self._discard(entry, "pool closed")
+            return
+        reason = self._recycle_reason(entry)
+        if reason is not None:
+            self._discard(entry, reason)
+            return
+        threading.Thread(target=self._park_and_return, args=(entry,), daemon=True).start()
+
+    def _park_and_return(self, entry):
+        try:
+            self.park_driver(entry.driver)
+        except Exception as e:
+            self._discard(entry, f"re-park failed: {str(e)}")
+            return
+        # close() may have drained the idle queue while this driver was re-parking;
+        # checking under the lock means it is either queued before the drain or quit here
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._idle.put(entry)
+        if closed:
+            self._discard(entry, "pool closed")
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Check a driver out for the duration of a with-block"""
+        entry = self.checkout(timeout)
+        try:
+            yield entry.driver
+        finally:
+            self.checkin(entry)
+
+    def close(self):
+        """Quit every idle driver and refuse new checkouts"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(entry, "pool closed")
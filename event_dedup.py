@@ -0,0 +1,90 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import WEBHOOK_DUPLICATES_TOTAL
+
+logger = logging.getLogger(__name__)
+
+EVENT_DEDUP_PATH = os.environ.get("KFC_EVENT_DEDUP_PATH", "kfc_webhook_events.sqlite3")
+
+# LINE redelivers unacknowledged events for a while; remember ids for a day
+EVENT_DEDUP_TTL = int(os.environ.get("KFC_EVENT_DEDUP_TTL", str(24 * 3600)))
+EVENT_DEDUP_PRUNE_INTERVAL = 60
+
+
+class EventDeduplicator:
+    """Idempotency store for webhook events keyed by webhookEventId
+
+    claim() records an id and says whether it is new; ids expire after ttl
+    seconds. The ids live in SQLite so every gunicorn worker on the host sees
+    them (a redelivery can land on a different worker than the original);
+    like DetailCache, the connection is opened lazily per process.
+    """
+
+    def __init__(self, path=EVENT_DEDUP_PATH, ttl=EVENT_DEDUP_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._pruned_at = 0.0
+
+        self.claimed = 0
+        self.duplicates = 0
+
+    def _connection(self):
+        """This process's SQLite connection (call with _lock held)"""
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            # Claims are cheap to lose on a crash (worst case one repeated reply), so skip fsyncs
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS events (event_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _prune(self, db, now):
+        if now - self._pruned_at < EVENT_DEDUP_PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        db.execute("DELETE FROM events WHERE seen_at < ?", (now - self.ttl,))
+
+    def claim(self, event_id):
+        """True if event_id is new (and now recorded), False if it was seen within ttl"""
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            self._prune(db, now)
+            # An expired row that hasn't been pruned yet counts as new
+            cursor = db.execute(
+                "INSERT INTO events (event_id, seen_at) VALUES (?, ?) "
+                "ON CONFLICT (event_id) DO UPDATE SET seen_at = excluded.seen_at WHERE seen_at < ?",
+                (event_id, now, now - self.ttl)
+            )
+            db.commit()
+            new = cursor.rowcount == 1
+            if new:
+                self.claimed += 1
+            else:
+                self.duplicates += 1
+        if not new:
+            WEBHOOK_DUPLICATES_TOTAL.inc()
+            logger.info(f"Dropping redelivered webhook event {event_id}")
+        return new
+
+    def release(self, event_id):
+        """Forget a claimed id, e.g. when the event could not be queued and LINE should redeliver it"""
+        with self._lock:
+            db = self._connection()
+            db.execute("DELETE FROM events WHERE event_id = ?", (event_id,))
+            db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"claimed": self.claimed, "duplicates": self.duplicates}
@@ -0,0 +1,121 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class EventQueue:
+    """Worker pool that processes LINE webhook events off the request path
+
+    The webhook verifies the signature, puts the parsed events here and returns
+    200 straight away; handle_event(event) then runs on one of the workers.
+    Workers are started lazily (and again after a fork) on the first put().
+    The workers are daemon threads, so a process that is shutting down calls
+    drain() first to finish the events it has already acknowledged.
+    """
+
+    def __init__(self, handle_event, workers=4, maxsize=1000, name="line-events"):
+        self.handle_event = handle_event
+        self.workers = workers
+        self.name = name
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._closed = False
+
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True).start()
+            self._pid = os.getpid()
+            logger.info(f"Started {self.workers} {self.name} workers")
+
+    def put(self, event):
+        """Enqueue an event; raises queue.Full when the backlog is at maxsize or the queue is draining"""
+        self._ensure_started()
+        try:
+            if self._closed:
+                raise queue.Full
+            self._queue.put_nowait((time.monotonic(), event))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise
+
+    def _work(self):
+        while True:
+            enqueued_at, event = self._queue.get()
+            waited = time.monotonic() - enqueued_at
+            with self._lock:
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._wait_last = waited
+            try:
+                self.handle_event(event)
+                failed = False
+            except Exception as e:
+                logger.exception(f"Error handling webhook event: {str(e)}")
+                failed = True
+            finally:
+                self._queue.task_done()
+            with self._lock:
+                self.processed += 1
+                if failed:
+                    self.failed += 1
+
+    def join(self):
+        """Block until every queued event has been handled"""
+        self._queue.join()
+
+    def drain(self, timeout):
+        """Stop accepting events and wait up to timeout seconds for the queued ones
+
+        Returns the events no worker started on in time, removed from the queue.
+        """
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._queue.all_tasks_done.wait(remaining)
+
+        left = []
+        while True:
+            try:
+                _, event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            left.append(event)
+        return left
+
+    def stats(self):
+        """Return queue depth, throughput counters and wait times in ms"""
+        with self._lock:
+            processed = self.processed
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "processed": processed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_avg_ms": round(self._wait_total / processed * 1000, 2) if processed else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 2),
+                "wait_last_ms": round(self._wait_last * 1000, 2),
+            }
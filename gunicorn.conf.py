@@ -0,0 +1,137 @@
+"""Production serving for the webhooks: pre-fork gunicorn with the catalog preloaded
+
+    gunicorn                  # webhook_kfc:app; gunicorn reads this file from the working directory
+    gunicorn webhook:app
+
+`python webhook_kfc.py` still starts Flask's single-process development server.
+
+The app module is imported once in the master (preload_app), where
+webhook_kfc.preload() loads the menu CSV, prebuilt carousel pages and the
+product name and attribute indexes. Workers are forked afterwards and share that memory
+copy-on-write; gc.freeze() before each fork keeps the collector from
+touching (and so copying) those pages.
+
+When kfc_menu.csv or kfc_products.json changes, a watcher thread in the
+master sends it SIGHUP: the master re-runs preload() and forks fresh workers
+while the old ones finish their in-flight requests (graceful_timeout).
+`kill -HUP <master pid>` does the same by hand. An exiting worker then
+spends up to KFC_DRAIN_TIMEOUT seconds replying to the events it already
+acknowledged (worker_exit), since its event threads die with it.
+
+Tuning (environment variables):
+
+    KFC_BIND           address to listen on (default 0.0.0.0:5000)
+    KFC_WEB_WORKERS    worker processes (default 2). Each worker has its own
+                       driver pool, so a host runs WEB_WORKERS x
+                       KFC_DRIVER_POOL_SIZE Chrome instances (~300 MB each);
+                       size this by memory, not CPU.
+    KFC_WEB_THREADS    HTTP threads per worker (default 8). Requests only
+                       verify the signature and enqueue, so a few threads
+                       absorb bursts; scraping and replying run on the
+                       LINE_EVENT_WORKERS event threads of each worker.
+    KFC_WEB_TIMEOUT    seconds before a stuck worker is restarted (default 30)
+    KFC_RELOAD_POLL    seconds between catalog mtime checks (default 5, 0 disables)
+    KFC_DRAIN_TIMEOUT  seconds an exiting worker waits for queued events
+                       (default 25; keep it under graceful_timeout)
+
+Metrics, /queue and /lookups are per worker process.
+"""
+import gc
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from menu_catalog import MENU_CSV_PATH
+from product_store import PRODUCT_STORE_PATH
+
+wsgi_app = "webhook_kfc:app"
+bind = os.environ.get("KFC_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("KFC_WEB_WORKERS", "2"))
+threads = int(os.environ.get("KFC_WEB_THREADS", "8"))
+worker_class = "gthread"
+timeout = int(os.environ.get("KFC_WEB_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+preload_app = True
+
+RELOAD_POLL = float(os.environ.get("KFC_RELOAD_POLL", "5"))
+DRAIN_TIMEOUT = float(os.environ.get("KFC_DRAIN_TIMEOUT", str(graceful_timeout - 5)))
+WATCHED_PATHS = (MENU_CSV_PATH, PRODUCT_STORE_PATH)
+
+logger = logging.getLogger("gunicorn.error")
+
+
+def _app_module(server):
+    """The imported app module (webhook_kfc or webhook), or None"""
+    app_uri = getattr(server.app, "app_uri", None) or server.cfg.wsgi_app or ""
+    return sys.modules.get(app_uri.split(":")[0])
+
+
+def _preload(server):
+    module = _app_module(server)
+    if module is not None and hasattr(module, "preload"):
+        started = time.perf_counter()
+        module.preload()
+        logger.info(f"Preloaded {module.__name__} in {time.perf_counter() - started:.2f}s")
+
+
+def _mtimes():
+    mtimes = []
+    for path in WATCHED_PATHS:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return mtimes
+
+
+def _watch_catalog(server):
+    """Master-side thread: SIGHUP the master when a watched file changes
+
+    It only stats files and signals; the reload itself runs on the master's
+    main thread (on_reload), so no lock can be held by this thread at fork.
+    """
+    last = _mtimes()
+    while True:
+        time.sleep(RELOAD_POLL)
+        current = _mtimes()
+        if current != last:
+            last = current
+            logger.info("Catalog changed on disk, reloading workers")
+            os.kill(server.pid, signal.SIGHUP)
+
+
+def when_ready(server):
+    _preload(server)
+    if RELOAD_POLL > 0:
+        threading.Thread(target=_watch_catalog, args=(server,), name="catalog-watch", daemon=True).start()
+
+
+def on_reload(server):
+    _preload(server)
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's generations
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Chrome can't be shared across fork; each worker launches its own pool in
+    # the background so booting stays well inside the worker timeout
+    module = _app_module(worker)
+    if module is not None and hasattr(module, "warm_up_drivers"):
+        threading.Thread(target=module.warm_up_drivers, name="driver-warm-up", daemon=True).start()
+
+
+def worker_exit(server, worker):
+    # Runs in the exiting worker once it stops serving requests. Its queued events
+    # were already acknowledged with 200 and claimed for dedup, so LINE won't
+    # resend them; reply to them before the daemon event threads are killed.
+    module = _app_module(worker)
+    webhook = getattr(module, "line_webhook", None)
+    if webhook is not None:
+        webhook.drain(DRAIN_TIMEOUT)
@@ -0,0 +1,79 @@
+"""Local HTTP stand-in for www.kfc.co.th that serves saved pages
+
+    python kfc_standin.py [pages_dir] [port]
+    KFC_BASE_URL=http://127.0.0.1:8001 python crawl_catalog.py
+
+Routes:
+    /menu/<category>              -> <pages_dir>/<category>.html
+                                     (/menu/meals falls back to kfc_menu_page.html)
+    /menu/<category>/<id>-prod    -> <pages_dir>/products/<id>.html
+"""
+import logging
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_PATH = re.compile(r"^/menu/([\w-]+)/?$")
+PRODUCT_PATH = re.compile(r"^/menu/[\w-]+/([\w-]+)-prod/?$")
+
+
+def resolve_page(pages_dir, path):
+    """Map a request path to a saved HTML file, or None"""
+    path = path.split("?", 1)[0]
+
+    match = PRODUCT_PATH.match(path)
+    if match:
+        return os.path.join(pages_dir, "products", f"{match.group(1)}.html")
+
+    match = CATEGORY_PATH.match(path)
+    if match:
+        candidate = os.path.join(pages_dir, f"{match.group(1)}.html")
+        if not os.path.exists(candidate) and match.group(1) == "meals":
+            candidate = os.path.join(pages_dir, "kfc_menu_page.html")
+        return candidate
+    return None
+
+
+def make_handler(pages_dir):
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = resolve_page(pages_dir, self.path)
+            if page is None or not os.path.isfile(page):
+                self.send_error(404)
+                return
+            with open(page, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return StandInHandler
+
+
+def start_standin(pages_dir=".", port=0, host="127.0.0.1"):
+    """Serve pages_dir on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(pages_dir))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    pages_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8001
+    server, base_url = start_standin(pages_dir, port)
+    print(f"🧪 Serving saved KFC pages from '{pages_dir}' at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,74 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Scroll one step, then resolve as soon as the DOM has been quiet for settleMs
+# (or after maxWaitMs). One WebDriver round trip per step.
+SCROLL_STEP_JS = """
+var step = arguments[0], settleMs = arguments[1], maxWaitMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var mutations = 0, finished = false, settleTimer = null, maxTimer = null;
+var observer = new MutationObserver(function (records) {
+    mutations += records.length;
+    clearTimeout(settleTimer);
+    settleTimer = setTimeout(finish, settleMs);
+});
+function finish() {
+    if (finished) { return; }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(settleTimer);
+    clearTimeout(maxTimer);
+    done({
+        cards: document.querySelectorAll('div.plp-item-card').length,
+        images: document.querySelectorAll('img.small-menu-product-image[src]').length,
+        position: Math.ceil(window.scrollY + window.innerHeight),
+        height: document.body.scrollHeight,
+        mutations: mutations
+    });
+}
+observer.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['src']});
+maxTimer = setTimeout(finish, maxWaitMs);
+settleTimer = setTimeout(finish, settleMs);
+window.scrollBy(0, step || window.innerHeight);
+"""
+
+
+def scroll_until_loaded(driver, step=None, settle_ms=300, max_wait_ms=3000, max_steps=200):
+    """Scroll down as fast as lazy-loaded cards appear and stop once they stop growing
+
+    Each step scrolls by `step` px (a viewport by default) and waits only until
+    a MutationObserver has seen no DOM changes for settle_ms. Scrolling stops at
+    the bottom of the page once a step adds no cards or images. Returns a summary
+    dict with the step count, card/image counts and total seconds.
+    """
+    driver.set_script_timeout(max_wait_ms / 1000 + 5)
+    started = time.perf_counter()
+    cards = images = 0
+    steps = 0
+
+    while steps < max_steps:
+        steps += 1
+        step_started = time.perf_counter()
+        state = driver.execute_async_script(SCROLL_STEP_JS, step, settle_ms, max_wait_ms)
+        elapsed_ms = (time.perf_counter() - step_started) * 1000
+
+        grew = state["cards"] > cards or state["images"] > images
+        cards, images = state["cards"], state["images"]
+        logger.info(
+            f"Scroll step {steps}: {state['position']}/{state['height']} px, "
+            f"{cards} cards, {images} images, {state['mutations']} mutations, {elapsed_ms:.0f} ms"
+        )
+
+        if state["position"] >= state["height"] and not grew:
+            break
+
+    summary = {
+        "steps": steps,
+        "cards": cards,
+        "images": images,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    logger.info(f"Scrolling finished: {summary}")
+    return summary
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import LINE_API_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Point LINE_API_BASE_URL at line_standin.py to test without the real API
+LINE_API_BASE_URL = os.environ.get("LINE_API_BASE_URL", "https://api.line.me").rstrip("/")
+
+# Replies must go out while the reply token is still valid; stop retrying after this
+REPLY_TOKEN_TTL = float(os.environ.get("LINE_REPLY_TOKEN_TTL", "50"))
+
+# LINE accepts at most five messages per reply
+MAX_REPLY_MESSAGES = 5
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LineApiError(Exception):
+    """Raised when the Messaging API rejects a request or retries run out"""
+
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+def message_json(message):
+    """Serialized JSON for a send message, reusing a prebuilt payload when available"""
+    prebuilt = getattr(message, "json_text", None)
+    if prebuilt is not None:
+        return prebuilt
+    return json.dumps(message.as_json_dict(), ensure_ascii=False)
+
+
+class LineClient:
+    """Messaging API client on a pooled keep-alive session with retries
+
+    Retries 429/5xx and connection errors with full-jitter exponential backoff,
+    but never past the reply token's lifetime (REPLY_TOKEN_TTL seconds after
+    the event's timestamp).
+    """
+
+    def __init__(self, channel_access_token, base_url=LINE_API_BASE_URL, pool_size=10,
+                 timeout=(3.05, 10), backoff_base=0.25, backoff_cap=4.0, max_attempts=5):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_attempts = max_attempts
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {channel_access_token}",
+            "Content-Type": "application/json",
+        })
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def post(self, path, body, deadline=None):
+        """POST a pre-encoded JSON body, retrying transient failures until deadline"""
+        url = f"{self.base_url}{path}"
+        data = body.encode("utf-8")
+        last_error = None
+
+        for attempt in range(self.max_attempts):
+            response = None
+            started = time.perf_counter()
+            try:
+                response = self.session.post(url, data=data, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                LINE_API_SECONDS.observe(time.perf_counter() - started, status="connection_error")
+                last_error = LineApiError(f"LINE API request failed: {str(e)}")
+            else:
+                LINE_API_SECONDS.observe(time.perf_counter() - started, status=str(response.status_code))
+                if response.status_code < 300:
+                    return response
+                last_error = LineApiError(
+                    f"LINE API returned {response.status_code} for {path}",
+                    status_code=response.status_code, body=response.text,
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    raise last_error
+
+            delay = self._backoff(attempt, response)
+            if attempt + 1 >= self.max_attempts or (deadline is not None and time.time() + delay >= deadline):
+                break
+            logger.warning(f"{str(last_error)}; retrying in {delay:.2f}s (attempt {attempt + 1})")
+            time.sleep(delay)
+
+        raise last_error
+
+    def reply(self, reply_token, messages, timestamp=None):
+        """Reply with up to five messages in one call
+
+        timestamp is the webhook event's timestamp in ms; retries stop once the
+        reply token is about to expire.
+        """
+        if not isinstance(messages, (list, tuple)):
+            messages = [messages]
+        if len(messages) > MAX_REPLY_MESSAGES:
+            raise ValueError(f"A reply can carry at most {MAX_REPLY_MESSAGES} messages")
+
+        received_at = timestamp / 1000 if timestamp else time.time()
+        body = '{"replyToken": %s, "messages": [%s]}' % (
+            json.dumps(reply_token), ", ".join(message_json(m) for m in messages)
+        )
+        return self.post("/v2/bot/message/reply", body, deadline=received_at + REPLY_TOKEN_TTL)
+
+    def reply_to(self, event, messages):
+        """Reply to a webhook event, bounding retries by the event's timestamp"""
+        return self.reply(event.reply_token, messages, timestamp=getattr(event, "timestamp", None))
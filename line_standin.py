@@ -0,0 +1,89 @@
+"""Local stand-in for the LINE Messaging API reply endpoint
+
+    python line_standin.py [port]
+    LINE_API_BASE_URL=http://127.0.0.1:8002 python webhook_kfc.py
+
+Every POST /v2/bot/message/reply is recorded. fail_next can be set to a list
+of status codes to return before succeeding, to exercise client retries.
+"""
+import json
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class LineStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0):
+        super().__init__(address, LineStandInHandler)
+        self.latency = latency
+        self.replies = []
+        self.fail_next = []
+        self.lock = threading.Lock()
+
+
+class LineStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        if self.path != "/v2/bot/message/reply":
+            self._send(404, {"message": "Not found"})
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        with self.server.lock:
+            status = self.server.fail_next.pop(0) if self.server.fail_next else 200
+        if status != 200:
+            self._send(status, {"message": "Injected failure"})
+            return
+
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            self._send(400, {"message": "The request body has 1 error(s)"})
+            return
+        if not payload.get("replyToken") or not 1 <= len(payload.get("messages", [])) <= 5:
+            self._send(400, {"message": "Invalid reply"})
+            return
+
+        with self.server.lock:
+            self.server.replies.append({"received_at": time.time(), "payload": payload})
+        self._send(200, {})
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def start_line_standin(port=0, host="127.0.0.1", latency=0.0):
+    """Run the stand-in on a background thread; returns (server, base_url)"""
+    server = LineStandIn((host, port), latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8002
+    server, base_url = start_line_standin(port)
+    print(f"🧪 LINE API stand-in listening at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
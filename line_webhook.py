@@ -0,0 +1,124 @@
+"""LINE webhook plumbing shared by webhook.py and webhook_kfc.py
+
+LineWebhook.register(app) adds the signed callback route, which dedups
+events by webhookEventId and queues them for the event workers before
+acknowledging, plus the /queue and /metrics routes. Each app only supplies
+its message and postback handlers; they return the reply path label that
+the latency and event-count metrics are recorded under.
+"""
+import logging
+import os
+import queue
+import time
+
+from flask import Response, abort, jsonify, request
+from linebot import WebhookParser
+from linebot.exceptions import InvalidSignatureError
+from linebot.models import MessageEvent, PostbackEvent, TextMessage
+
+from event_dedup import EventDeduplicator
+from event_queue import EventQueue
+from metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE, WEBHOOK_REPLY_SECONDS, WEBHOOK_EVENTS_TOTAL
+
+# Worker threads that scrape and reply (tune with LINE_EVENT_WORKERS / LINE_EVENT_QUEUE_SIZE)
+EVENT_WORKERS = int(os.environ.get("LINE_EVENT_WORKERS", "4"))
+EVENT_QUEUE_SIZE = int(os.environ.get("LINE_EVENT_QUEUE_SIZE", "1000"))
+
+logger = logging.getLogger(__name__)
+
+
+class LineWebhook:
+    """Signed LINE callback that acknowledges at once and replies from worker threads
+
+    handle_message(event) gets text message events and handle_postback(event)
+    postbacks, both on an EventQueue worker.
+    """
+
+    def __init__(self, channel_secret, handle_message, handle_postback,
+                 workers=EVENT_WORKERS, maxsize=EVENT_QUEUE_SIZE):
+        self.parser = WebhookParser(channel_secret)
+        self.handle_message = handle_message
+        self.handle_postback = handle_postback
+        self.event_queue = EventQueue(self.dispatch_event, workers=workers, maxsize=maxsize)
+
+        # webhookEventIds seen in the last KFC_EVENT_DEDUP_TTL seconds, shared by all workers on the host
+        self.event_dedup = EventDeduplicator()
+
+        REGISTRY.gauge("kfc_event_queue_depth", "Events waiting for a worker",
+                       lambda: self.event_queue.stats()["queue_depth"])
+
+    def register(self, app):
+        """Add the callback, /queue and /metrics routes to a Flask app"""
+        app.add_url_rule("/", "callback", self.callback, methods=["POST"])
+        app.add_url_rule("/queue", "queue_stats", self.queue_stats, methods=["GET"])
+        app.add_url_rule("/metrics", "metrics", self.metrics, methods=["GET"])
+
+    def dispatch_event(self, event):
+        """Route a parsed webhook event to its handler (runs on a worker thread)"""
+        started = time.perf_counter()
+        path = None
+        try:
+            if isinstance(event, MessageEvent) and isinstance(event.message, TextMessage):
+                path = self.handle_message(event)
+            elif isinstance(event, PostbackEvent):
+                path = self.handle_postback(event)
+        except Exception:
+            path = "exception"
+            raise
+        finally:
+            if path:
+                WEBHOOK_REPLY_SECONDS.observe(time.perf_counter() - started, path=path)
+                WEBHOOK_EVENTS_TOTAL.inc(path=path)
+
+    # Webhook endpoint for LINE to call
+    def callback(self):
+        signature = request.headers['X-Line-Signature']
+        body = request.get_data(as_text=True)
+
+        try:
+            events = self.parser.parse(body, signature)
+        except InvalidSignatureError:
+            abort(400)
+
+        # Acknowledge right away; the event workers handle a batch's events concurrently.
+        # Redelivered events that were already accepted are dropped by webhookEventId.
+        for event in events:
+            event_id = getattr(event, "webhook_event_id", None)
+            if event_id and not self.event_dedup.claim(event_id):
+                continue
+            try:
+                self.event_queue.put(event)
+            except queue.Full:
+                # Unclaim it so LINE's redelivery of this batch isn't dropped as a duplicate
+                if event_id:
+                    self.event_dedup.release(event_id)
+                abort(503)
+
+        return 'OK'
+
+    def drain(self, timeout):
+        """Finish the queued events before the process exits (gunicorn's worker_exit)
+
+        Events still queued after timeout seconds are dropped, and their
+        webhookEventIds are released so a redelivery of them is handled
+        instead of being discarded as a duplicate.
+        """
+        started = time.monotonic()
+        left = self.event_queue.drain(timeout)
+        for event in left:
+            event_id = getattr(event, "webhook_event_id", None)
+            if event_id:
+                self.event_dedup.release(event_id)
+        if left:
+            logger.warning(f"Dropped {len(left)} queued webhook events at shutdown")
+        else:
+            logger.info(f"Drained webhook events in {time.monotonic() - started:.1f}s")
+        return left
+
+    # Queue depth and wait times of the event workers
+    def queue_stats(self):
+        return jsonify(self.event_queue.stats())
+
+    # Prometheus scrape endpoint: reply latency by path, LINE API latency and (webhook_kfc) scrape stages
+    def metrics(self):
+        return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,333 @@
+"""Typed product attributes and an in-memory index for filtered menu queries
+
+    "buckets under 400", "ข้าว ไม่เกิน 100", "8 pcs", "burger with fries", "rice bowl"
+
+parse_attributes() turns a product's name plus the badge and price text
+that extract_product_info() scraped into price / pieces / category / sides;
+crawl_product_store() stores them on each record. AttributeIndex is built
+once per store load next to the NameIndex, with products pre-sorted by price
+and bucketed by category, so answering a query is a bisect plus a short scan.
+"""
+import bisect
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+
+from menu_parser import parse_price
+from name_index import normalize_search_text
+
+MenuAttributes = namedtuple("MenuAttributes", ["price", "pieces", "category", "sides"])
+
+# What a filtered query asks for; every field is optional (None / empty). browse is
+# True when the category came from a generic noun ("buckets", "rice") rather than
+# a word of a product name ("pepsi", "nuggets").
+MenuQuery = namedtuple("MenuQuery", ["category", "min_price", "max_price", "pieces", "sides", "terms", "browse"])
+
+# Checked in order against the normalized product name; the first match is the
+# product's category, every match is a tag (so "The Box All Rice" is a box that
+# also shows up for "rice"). Patterns run on normalize_search_text() output,
+# so the Thai spellings in name_index.THAI_ALIASES are already English.
+CATEGORY_PATTERNS = (
+    ("bucket", r"buckets?"),
+    ("box", r"box(?:es)?"),
+    ("burger", r"burgers?"),
+    ("rice", r"rice"),
+    ("meal", r"meals?|combos?|sets?"),
+    ("dessert", r"tarts?|desserts?|ของหวาน"),
+    ("drink", r"drinks?|pepsi|7 up|water|latte|americano|espresso|cappuccino|chocolate|milk|glass|\d+ ?oz"
+              r"|เครื่องดื่ม"),
+    ("side", r"sides?|fries|coleslaw|mashed|salad|ของทานเล่น"),
+    ("chicken", r"chicken|nuggets?|wingz?|strips?|pop|roll|donut"),
+)
+CATEGORY_ORDER = {category: order for order, (category, _) in enumerate(CATEGORY_PATTERNS)}
+
+# Words (stemmed) that name a category as such; any other category word, like
+# "pepsi", is also part of product names and stays a name term
+CATEGORY_NOUNS = {"bucket", "box", "burger", "rice", "meal", "combo", "set", "dessert", "drink", "side", "chicken"}
+
+
+def _words(pattern):
+    # Latin words need boundaries; Thai is written without spaces, so Thai words match anywhere
+    return re.compile(rf"(?<![a-z0-9])(?:{pattern})(?![a-z0-9])")
+
+
+_CATEGORY_REGEXES = tuple((category, _words(pattern)) for category, pattern in CATEGORY_PATTERNS)
+
+# Crawled menu listings (crawl_catalog.CATEGORIES) that hold every kind of product;
+# /menu/meals has boxes, burgers, rice and chicken alike, so its products keep the
+# category their name gives. Other listings ("buckets", "drinks") name their category.
+GENERIC_LISTINGS = {"meals"}
+
+# Side items named in combo badges, by canonical name
+SIDE_PATTERNS = (
+    ("fries", r"(?:french )?fries|ฟรายส์"),
+    ("coleslaw", r"coleslaw|โคลสลอว์"),
+    ("mashed potato", r"mashed|มันบด"),
+    ("corn", r"corn|ข้าวโพด"),
+    ("nuggets", r"nuggets?"),
+    ("wingz", r"wingz?"),
+    ("chicken pop", r"pop"),
+    ("egg tart", r"tarts?"),
+    ("rice", r"rice"),
+    ("drink", r"drinks?|pepsi|7 up|soft drink|เครื่องดื่ม|น้ำอัดลม"),
+)
+_SIDE_REGEXES = tuple((side, _words(pattern)) for side, pattern in SIDE_PATTERNS)
+
+# "8 pcs.", "2pcs", "1 pc", "6 pieces", "8 ชิ้น"
+PIECES_PATTERN = re.compile(r"(\d+)\s*(?:pcs?|pieces?|ชิ้น)(?![a-z])")
+BARE_PRICE = re.compile(r"^\s*(\d[\d,]*(?:\.\d+)?)\s*$")
+
+# Price bounds in queries: "under 400", "ไม่เกิน 400", "< 400", "over 200", "200-400", "ราคา 400 บาท"
+_AMOUNT = r"(?:฿|thb)?\s*(\d[\d,]*)\s*(?:฿|บาท|thb|baht|\.-)?"
+PRICE_RANGE = re.compile(rf"(?:between|ระหว่าง)?\s*(\d[\d,]*)\s*(?:-|to|ถึง)\s*{_AMOUNT}")
+MAX_PRICE = re.compile(
+    rf"(?:under|below|less than|cheaper than|up to|max|within|<=?|ไม่เกิน|ต่ำกว่า|น้อยกว่า|ไม่ถึง)\s*{_AMOUNT}"
+)
+MIN_PRICE = re.compile(rf"(?:over|above|more than|at least|min|>=?|มากกว่า|เกิน|ตั้งแต่)\s*{_AMOUNT}")
+# A bare amount with a currency is read as a budget
+BUDGET = re.compile(r"(?:฿|thb)\s*(\d[\d,]*)|(\d[\d,]*)\s*(?:฿|บาท|thb|baht|\.-)")
+
+# "burger with fries": side items only count as a filter after one of these
+SIDE_MARKERS = {"with", "plus", "and", "พร้อม", "และ", "กับ"}
+
+# Words that carry no filter meaning. Leftover Thai words are dropped as well:
+# product names are English, so they could never match.
+QUERY_STOPWORDS = {
+    "kfc", "the", "a", "an", "for", "me", "show", "find", "any", "all", "some", "menu", "menus",
+    "price", "priced", "cost", "baht", "thb", "cheap", "what", "which", "do", "you", "have",
+}
+THAI_TEXT = re.compile(r"[\u0E00-\u0E7F]")
+
+
+def _number(text):
+    return float(text.replace(",", ""))
+
+
+def text_price(text):
+    """Baht amount in scraped price text ("฿ 399", "399 บาท", or a bare "399"), or None"""
+    price = parse_price(text)
+    if price is None:
+        match = BARE_PRICE.match(text or "")
+        if match:
+            price = _number(match.group(1))
+    return price
+
+
+def name_categories(normalized_name):
+    """Every category whose pattern matches the normalized name, in CATEGORY_PATTERNS order"""
+    return [category for category, regex in _CATEGORY_REGEXES if regex.search(normalized_name)]
+
+
+def listing_category(listing):
+    """Category for a crawled listing ("buckets" -> "bucket", "drinks" -> "drink"), None for "meals" """
+    if not listing or listing in GENERIC_LISTINGS:
+        return None
+    return next(iter(name_categories(normalize_search_text(listing))), None)
+
+
+def find_sides(normalized_text):
+    return tuple(side for side, regex in _SIDE_REGEXES if regex.search(normalized_text))
+
+
+def count_pieces(text):
+    """All piece counts in text, e.g. [6, 2] for "Egg Tart 6pcs. Free 2pcs." """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return [int(count) for count in PIECES_PATTERN.findall(text)]
+
+
+def parse_attributes(name, product_info=None, listing_text="", category=None):
+    """Typed MenuAttributes from a product name and the fields extract_product_info() returns
+
+    price comes from the detail page's price text, then the badge, then the
+    listing card's price text. pieces is the total the name states
+    ("6pcs. Free 2pcs." -> 8), else the first count in the badge (a combo's
+    chicken). category is the crawler's listing ("buckets") when it names a
+    category, else inferred from the name. sides are the side items the badge
+    and description list.
+    """
+    product_info = product_info or {}
+    badge = product_info.get("badge_text") or ""
+    components = " ".join([badge, product_info.get("description") or ""])
+
+    price = None
+    for text in (product_info.get("price"), badge, listing_text):
+        price = text_price(text)
+        if price is not None:
+            break
+
+    counts = count_pieces(name)
+    pieces = sum(counts) if counts else next(iter(count_pieces(badge)), None)
+
+    category = listing_category(category)
+    if not category:
+        category = next(iter(name_categories(normalize_search_text(name))), None)
+
+    # A bucket's badge naming its own chicken isn't a side item
+    own = find_sides(normalize_search_text(name))
+    sides = tuple(side for side in find_sides(normalize_search_text(components)) if side not in own)
+    return MenuAttributes(price, pieces, category, sides)
+
+
+def record_attributes(record):
+    """MenuAttributes stored on a product record, parsed from its info for records crawled before they were"""
+    stored = record.get("attributes")
+    if stored:
+        return MenuAttributes(stored.get("price"), stored.get("pieces"), stored.get("category"),
+                              tuple(stored.get("sides") or ()))
+    return parse_attributes(record["name"], record.get("info"), category=record.get("category"))
+
+
+def _stem(word):
+    if len(word) > 3 and word.endswith("es") and word[-3] in "xsh":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _take(pattern, text, on_match):
+    """Apply on_match to each match of pattern and cut the matches out of text"""
+    def cut(match):
+        on_match(match)
+        return " "
+    return pattern.sub(cut, text)
+
+
+def parse_query(text):
+    """MenuQuery for text that asks for a category, price range, piece count or side, else None
+
+    Leftover words become terms every result's name must contain, so
+    "rice bowl" is the rice category narrowed to names with "bowl". A
+    category word that isn't a generic noun is kept as a term too, so
+    "pepsi" finds the Pepsi drinks, not every drink.
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    bounds = {}
+
+    def price_range(match):
+        low, high = sorted((_number(match.group(1)), _number(match.group(2))))
+        bounds.setdefault("min", low)
+        bounds.setdefault("max", high)
+
+    text = _take(PRICE_RANGE, text, price_range)
+    # "ไม่เกิน" contains "เกิน", so upper bounds are cut out before lower ones
+    text = _take(MAX_PRICE, text, lambda m: bounds.setdefault("max", _number(m.group(1))))
+    text = _take(MIN_PRICE, text, lambda m: bounds.setdefault("min", _number(m.group(1))))
+    text = _take(BUDGET, text, lambda m: bounds.setdefault("max", _number(m.group(1) or m.group(2))))
+
+    counts = []
+    text = _take(PIECES_PATTERN, text, lambda m: counts.append(int(m.group(1))))
+
+    words = normalize_search_text(text).split()
+    sides = []
+    marker = next((i for i, word in enumerate(words) if word in SIDE_MARKERS), None)
+    if marker is not None:
+        tail = " ".join(words[marker + 1:])
+        for side, regex in _SIDE_REGEXES:
+            tail = _take(regex, tail, lambda m, side=side: sides.append(side))
+        words = words[:marker] + tail.split()
+    sides = list(dict.fromkeys(sides))
+
+    words = [word for word in words if word not in SIDE_MARKERS and word not in QUERY_STOPWORDS]
+    # The most specific category named wins ("chicken rice" is rice); other words narrow by name
+    category, category_word = None, None
+    for i, word in enumerate(words):
+        for candidate in name_categories(word)[:1]:
+            if category is None or CATEGORY_ORDER[candidate] < CATEGORY_ORDER[category]:
+                category, category_word = candidate, i
+    browse = False
+    if category_word is not None:
+        word = words[category_word]
+        # Thai category words ("เครื่องดื่ม") are never part of the English product names
+        browse = _stem(word) in CATEGORY_NOUNS or bool(THAI_TEXT.search(word))
+    terms = tuple(
+        _stem(word) for i, word in enumerate(words)
+        if not (i == category_word and browse) and not THAI_TEXT.search(word)
+    )
+
+    if category is None and not bounds and not counts and not sides:
+        return None
+    return MenuQuery(category, bounds.get("min"), bounds.get("max"),
+                     counts[0] if counts else None, tuple(sides), terms, browse)
+
+
+def is_filtered(query):
+    """True when the query bounds the price or asks for a piece count or side items"""
+    return (query.min_price is not None or query.max_price is not None
+            or query.pieces is not None or bool(query.sides))
+
+
+# One indexed product: the record plus what queries filter on
+AttributeEntry = namedtuple("AttributeEntry", ["record", "attributes", "key", "tags", "words"])
+
+
+class AttributeIndex:
+    """Precomputed attribute lookups over the product store
+
+    Entries are sorted by price (unpriced last) and each category keeps the
+    ascending positions of its entries, so a price bound is two bisects on
+    the candidate list and only the survivors are checked for pieces, sides
+    and name terms. Build it once per store load; it is never mutated.
+    """
+
+    def __init__(self, records):
+        entries = []
+        for record in records:
+            attributes = record_attributes(record)
+            name_key = normalize_search_text(record["name"])
+            tags = set(name_categories(name_key))
+            if attributes.category:
+                tags.add(attributes.category)
+            words = frozenset(_stem(word) for word in name_key.split())
+            entries.append(AttributeEntry(record, attributes, name_key, frozenset(tags), words))
+
+        entries.sort(key=lambda entry: (entry.attributes.price is None, entry.attributes.price or 0.0))
+        self._entries = tuple(entries)
+        self._prices = [entry.attributes.price for entry in entries if entry.attributes.price is not None]
+        self._by_tag = defaultdict(list)
+        for position, entry in enumerate(entries):
+            for tag in entry.tags:
+                self._by_tag[tag].append(position)
+        self._all = list(range(len(entries)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def categories(self):
+        """Number of products per category tag"""
+        return {tag: len(positions) for tag, positions in self._by_tag.items()}
+
+    def search(self, query, limit=None):
+        """AttributeEntry list matching the query: exact category first (if one is asked for), then cheapest first
+
+        A product listed under several ids (one per menu category) appears once.
+        """
+        candidates = self._by_tag.get(query.category, ()) if query.category else self._all
+
+        if query.min_price is not None or query.max_price is not None:
+            # Positions are in price order, so the bounds are a contiguous slice of positions
+            low = bisect.bisect_left(self._prices, query.min_price) if query.min_price is not None else 0
+            high = bisect.bisect_right(self._prices, query.max_price) if query.max_price is not None else len(self._prices)
+            candidates = candidates[bisect.bisect_left(candidates, low):bisect.bisect_left(candidates, high)]
+
+        primary = []
+        tagged = []
+        seen = set()
+        for position in candidates:
+            entry = self._entries[position]
+            if entry.key in seen:
+                continue
+            attributes = entry.attributes
+            if query.pieces is not None and attributes.pieces != query.pieces:
+                continue
+            if query.sides and not all(side in attributes.sides for side in query.sides):
+                continue
+            if query.terms and not all(term in entry.words for term in query.terms):
+                continue
+            seen.add(entry.key)
+            if query.category and attributes.category != query.category:
+                tagged.append(entry)
+            else:
+                primary.append(entry)
+        results = primary + tagged
+        return results[:limit] if limit else results
@@ -0,0 +1,102 @@
+import csv
+import logging
+import os
+import threading
+from collections import namedtuple
+
+from product_store import normalize_name
+from thumbnails import public_thumbnail_url, thumbnail_url
+
+logger = logging.getLogger(__name__)
+
+MENU_CSV_PATH = "kfc_menu.csv"
+
+# thumbnail_url is the carousel-sized variant of image_url
+MenuItem = namedtuple("MenuItem", ["name", "image_url", "thumbnail_url"])
+
+# An immutable view of the catalog; version increases on every reload.
+# by_name maps normalized product names to items and must not be mutated.
+MenuSnapshot = namedtuple("MenuSnapshot", ["version", "mtime_ns", "items", "by_name"])
+
+
+def load_menu_items(csv_path):
+    """Read menu rows from the crawler CSV, dropping duplicate product names"""
+    items = []
+    seen = set()
+    with open(csv_path, newline='', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            name = row.get("Menu Item")
+            image = row.get("Image URL")
+            if not (name and image):
+                continue
+            key = normalize_name(name)
+            if key in seen:
+                continue
+            seen.add(key)
+            # Prefer the locally cached copy, then the crawler's variant URL; older CSVs have neither
+            thumbnail = (
+                public_thumbnail_url(row.get("Thumbnail File"))
+                or row.get("Thumbnail URL")
+                or thumbnail_url(image)
+            )
+            items.append(MenuItem(name, image, thumbnail))
+    return tuple(items)
+
+
+class MenuCatalog:
+    """Process-wide menu catalog loaded once and hot-reloaded on CSV changes
+
+    snapshot() costs one os.stat(). When the file's mtime changed, a single
+    thread re-reads it and swaps in a new MenuSnapshot; every other reader
+    keeps getting the previous snapshot instead of waiting.
+    """
+
+    def __init__(self, csv_path=MENU_CSV_PATH):
+        self.csv_path = csv_path
+        self._reload_lock = threading.Lock()
+        self._snapshot = MenuSnapshot(0, None, (), {})
+        self.reload()
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.csv_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def reload(self, blocking=True):
+        """Re-read the CSV and publish a new snapshot; returns the current snapshot"""
+        if not self._reload_lock.acquire(blocking=blocking):
+            return self._snapshot
+        try:
+            mtime = self._current_mtime()
+            if mtime is None:
+                logger.warning(f"⚠️ CSV file '{self.csv_path}' not found.")
+                return self._snapshot
+            try:
+                items = load_menu_items(self.csv_path)
+            except (OSError, csv.Error) as e:
+                logger.warning(f"Could not reload menu CSV '{self.csv_path}': {str(e)}")
+                return self._snapshot
+            # A single attribute assignment is atomic, so readers see old or new, never half
+            by_name = {normalize_name(item.name): item for item in items}
+            self._snapshot = MenuSnapshot(self._snapshot.version + 1, mtime, items, by_name)
+            logger.info(f"Loaded {len(items)} menu items (version {self._snapshot.version})")
+            return self._snapshot
+        finally:
+            self._reload_lock.release()
+
+    def snapshot(self):
+        """Return the current snapshot, reloading first if the CSV changed"""
+        snapshot = self._snapshot
+        mtime = self._current_mtime()
+        if mtime is not None and mtime != snapshot.mtime_ns:
+            return self.reload(blocking=False)
+        return snapshot
+
+    def items(self):
+        """Return the current tuple of MenuItem"""
+        return self.snapshot().items
+
+    def find(self, name):
+        """Return the MenuItem with this (normalized) name, or None"""
+        return self.snapshot().by_name.get(normalize_name(name))
@@ -0,0 +1,150 @@
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+CARD_CLASS = "plp-item-card"
+HEADER_CLASS = "small-menu-product-header"
+IMAGE_CLASS = "small-menu-product-image"
+RIBBON_CLASS = "discount-ribbon-text"
+PRICE_CLASS = "Price-and-KJ-info"
+
+# "฿ 399", "THB 1,099.00", "399 บาท", "399.-"
+PRICE_PATTERN = re.compile(
+    r"(?:฿|THB)\s*(\d[\d,]*(?:\.\d+)?)|(\d[\d,]*(?:\.\d+)?)\s*(?:฿|บาท|THB|\.-)"
+)
+
+# One product card from a menu listing; image_url is "" for cards whose image
+# was not loaded yet, price is None when the card shows no price
+MenuCard = namedtuple("MenuCard", ["id", "name", "image_url", "badge", "price"])
+
+
+def strip_query(url):
+    """Drop the query string (Contentful resize parameters) from an image URL"""
+    return urlparse(url)._replace(query="").geturl()
+
+
+def parse_price(text):
+    """Return the first baht amount in text as a float, or None"""
+    match = PRICE_PATTERN.search(text or "")
+    if match is None:
+        return None
+    return float((match.group(1) or match.group(2)).replace(",", ""))
+
+
+class MenuCardParser(HTMLParser):
+    """Event-based extractor that emits one MenuCard per plp-item-card
+
+    Name, image, ribbon and price are read from inside the same card, so a
+    card without an image can't shift the pairing of the cards after it.
+    Cards are deduplicated by id. Works in one pass without building a tree
+    and can be fed the page in chunks.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards = []
+        self._seen_ids = set()
+        self._card_depth = 0
+        # Which field the text currently being read belongs to, and its tag depth
+        self._field = None
+        self._field_depth = 0
+        # Text since the last tag; a chunk boundary can split it across handle_data calls
+        self._text = []
+        self._reset_card(None)
+
+    def _reset_card(self, card_id):
+        self._card_id = card_id
+        self._name = []
+        self._image_url = ""
+        self._ribbon = []
+        self._price = []
+
+    def _flush_text(self):
+        """Add the text run that ended at this tag to the field being read"""
+        if self._text:
+            text = "".join(self._text).strip()
+            self._text = []
+            if text:
+                self._field.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag != "div" and tag != "img" and tag != "span":
+            return
+        attributes = dict(attrs)
+        classes = (attributes.get("class") or "").split()
+
+        if not self._card_depth:
+            if tag == "div" and CARD_CLASS in classes:
+                self._card_depth = 1
+                self._reset_card(attributes.get("id"))
+            return
+
+        if tag == "img":
+            src = attributes.get("src")
+            if src and not self._image_url and IMAGE_CLASS in classes:
+                self._image_url = strip_query(src)
+            return
+
+        if tag == "div":
+            self._card_depth += 1
+        if self._field is not None:
+            if tag == "div" or tag == "span":
+                self._field_depth += 1
+        elif HEADER_CLASS in classes:
+            self._field, self._field_depth = self._name, 1
+        elif RIBBON_CLASS in classes:
+            self._field, self._field_depth = self._ribbon, 1
+        elif PRICE_CLASS in classes:
+            self._field, self._field_depth = self._price, 1
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if not self._card_depth or (tag != "div" and tag != "span"):
+            return
+        if self._field is not None:
+            self._field_depth -= 1
+            if not self._field_depth:
+                self._field = None
+        if tag == "div":
+            self._card_depth -= 1
+            if not self._card_depth:
+                self._emit_card()
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._text.append(data)
+
+    def _emit_card(self):
+        name = "".join(self._name)
+        if not (self._card_id and name) or self._card_id in self._seen_ids:
+            return
+        self._seen_ids.add(self._card_id)
+        ribbon = " ".join(self._ribbon)
+        price_text = " ".join(self._price)
+        self.cards.append(MenuCard(
+            self._card_id,
+            name,
+            self._image_url,
+            " | ".join(text for text in (ribbon, price_text) if text),
+            parse_price(price_text),
+        ))
+
+
+def parse_menu_cards(html):
+    """Extract [MenuCard] from a menu page in a single pass"""
+    parser = MenuCardParser()
+    parser.feed(html)
+    parser.close()
+    return parser.cards
+
+
+def parse_menu_cards_file(path, chunk_size=64 * 1024):
+    """Like parse_menu_cards, but streams the file instead of reading it whole"""
+    parser = MenuCardParser()
+    with open(path, encoding="utf-8") as f:
+        for chunk in iter(lambda: f.read(chunk_size), ""):
+            parser.feed(chunk)
+    parser.close()
+    return parser.cards
@@ -0,0 +1,195 @@
+"""Minimal in-process metrics with Prometheus text exposition
+
+Counters, histograms and callback gauges keyed by label values; render()
+produces the text format served from the webhooks' /metrics route.
+"""
+import functools
+import threading
+import time
+
+# Seconds; covers fast cache hits up to slow Selenium scrapes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class _Timer:
+    """Times one `with` block; as a decorator, each call gets its own _Timer
+
+    (contextlib.ContextDecorator would reuse this instance for every call, so
+    overlapping calls on different threads would overwrite _started.)
+    """
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            with _Timer(self.histogram, self.labels):
+                return func(*args, **kwargs)
+        return timed
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._started, **self.labels)
+        return False
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Context manager / decorator that observes the elapsed seconds"""
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """A gauge whose value is read from a callback at scrape time"""
+
+    def __init__(self, name, documentation, function):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            lines.append(f"{self.name} {_format_value(self.function())}")
+        except Exception:
+            pass
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, function):
+        """Register (or replace) a callback gauge"""
+        gauge = Gauge(name, documentation, function)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Shared metrics used by the scraper, the LINE client and the webhooks
+SCRAPE_STAGE_SECONDS = REGISTRY.histogram(
+    "kfc_scrape_stage_seconds", "Time spent in each product scrape stage", ["stage"])
+SCRAPES_TOTAL = REGISTRY.counter(
+    "kfc_scrapes_total", "Product scrapes by result", ["result"])
+WEBHOOK_REPLY_SECONDS = REGISTRY.histogram(
+    "kfc_webhook_handle_seconds", "Time from dequeuing an event to finishing its reply", ["path"])
+WEBHOOK_EVENTS_TOTAL = REGISTRY.counter(
+    "kfc_webhook_events_total", "Handled webhook events by path", ["path"])
+LINE_API_SECONDS = REGISTRY.histogram(
+    "kfc_line_api_seconds", "LINE Messaging API call latency by outcome", ["status"])
+ADMISSION_REJECTIONS_TOTAL = REGISTRY.counter(
+    "kfc_admission_rejections_total", "Live scrape requests shed by admission control", ["reason"])
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "kfc_admission_wait_seconds", "Time a live scrape waited for a free slot")
+WEBHOOK_DUPLICATES_TOTAL = REGISTRY.counter(
+    "kfc_webhook_duplicate_events_total", "Redelivered webhook events dropped by webhookEventId")
@@ -0,0 +1,140 @@
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+
+# Thai spellings users type for words that appear in the English product names
+THAI_ALIASES = {
+    "บักเก็ต": "bucket",
+    "บัคเก็ต": "bucket",
+    "บักเกต": "bucket",
+    "ถัง": "bucket",
+    "ออลสตาร์": "all star",
+    "เดอะบ็อกซ์": "the box",
+    "บ็อกซ์": "box",
+    "บ๊อกซ์": "box",
+    "แซ่บ": "zabb",
+    "แซบ": "zabb",
+    "แกงเขียวหวาน": "green curry",
+    "ข้าว": "rice",
+    "ชาม": "bowl",
+    "โบว์ล": "bowl",
+    "คอมโบ": "combo",
+    "ชุด": "combo",
+    "ไก่ทอด": "fried chicken",
+    "ไก่": "chicken",
+    "ป๊อป": "pop",
+    "ป็อป": "pop",
+    "วิงซ์": "wingz",
+    "ปีก": "wingz",
+    "นักเก็ต": "nuggets",
+    "เบอร์เกอร์": "burger",
+    "ทาร์ต": "tart",
+    "เฟรนช์ฟรายส์": "french fries",
+    "เฟรนช์ฟราย": "french fries",
+    "มันฝรั่งทอด": "french fries",
+    "เป๊ปซี่": "pepsi",
+    "เป็ปซี่": "pepsi",
+    "แก้ว": "glass",
+    "ชิ้น": "pcs",
+}
+
+# Longest first so "ไก่ทอด" wins over "ไก่"
+_ALIAS_PATTERN = re.compile("|".join(re.escape(k) for k in sorted(THAI_ALIASES, key=len, reverse=True)))
+
+# Anything that is not a word or Thai character becomes a space
+_PUNCTUATION = re.compile(r"[^\w\u0E00-\u0E7F]+")
+
+NameMatch = namedtuple("NameMatch", ["product_id", "name", "url", "score"])
+
+
+def normalize_search_text(text):
+    """Casefold, map Thai aliases to English and strip punctuation/extra spaces"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _ALIAS_PATTERN.sub(lambda m: f" {THAI_ALIASES[m.group(0)]} ", text)
+    text = _PUNCTUATION.sub(" ", text.replace("_", " "))
+    return " ".join(text.split())
+
+
+def trigrams(text):
+    """Character trigrams of the space-free text, padded so short names still match"""
+    compact = f"  {text.replace(' ', '')} "
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+class NameIndex:
+    """Resolve free-form user text to a product id and detail URL
+
+    Lookups try the normalized name, then the same name with spaces removed,
+    then trigram (Dice) similarity for typos and partial names. Build it once per catalog
+    load; every lookup is a few dict/set operations.
+    """
+
+    def __init__(self, products, min_score=0.5):
+        self.min_score = min_score
+        self._entries = []
+        self._exact = {}
+        self._compact = {}
+        self._grams = []
+        self._postings = defaultdict(list)
+
+        for product in products:
+            key = normalize_search_text(product["name"])
+            if not key or key in self._exact:
+                continue
+            entry_id = len(self._entries)
+            self._entries.append((product["id"], product["name"], product.get("url")))
+            self._exact[key] = entry_id
+            self._compact.setdefault(key.replace(" ", ""), entry_id)
+
+            grams = trigrams(key)
+            self._grams.append(grams)
+            for gram in grams:
+                self._postings[gram].append(entry_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _match(self, entry_id, score):
+        product_id, name, url = self._entries[entry_id]
+        return NameMatch(product_id, name, url, score)
+
+    def _best(self, key):
+        """(entry id, score) of the name closest to the normalized text; (None, 0.0) if none shares a trigram"""
+        entry_id = self._exact.get(key)
+        if entry_id is None:
+            entry_id = self._compact.get(key.replace(" ", ""))
+        if entry_id is not None:
+            return entry_id, 1.0
+
+        grams = trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] += 1
+
+        best_id, best_score = None, 0.0
+        for candidate, count in shared.items():
+            score = 2 * count / (len(grams) + len(self._grams[candidate]))
+            # Ties go to the shorter name, i.e. the closer overall match
+            if score > best_score or (score == best_score and len(self._grams[candidate]) < len(self._grams[best_id])):
+                best_id, best_score = candidate, score
+        return best_id, best_score
+
+    def resolve(self, text):
+        """Return the best NameMatch for the text, or None if nothing is close enough"""
+        key = normalize_search_text(text)
+        if not key:
+            return None
+        entry_id, score = self._best(key)
+        if entry_id is None or score < self.min_score:
+            return None
+        return self._match(entry_id, round(score, 3))
+
+    def similarity(self, text):
+        """Score of the closest product name for the text (0.0 to 1.0), however low"""
+        key = normalize_search_text(text)
+        if not key:
+            return 0.0
+        return round(self._best(key)[1], 3)
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import unicodedata
+
+from menu_attributes import AttributeIndex, parse_attributes
+from name_index import NameIndex
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_STORE_PATH = "kfc_products.json"
+
+# Detail pages are re-crawled after this long even if the listing card is unchanged
+DETAIL_MAX_AGE = int(os.environ.get("KFC_DETAIL_MAX_AGE_HOURS", "168")) * 3600
+
+# A listing with fewer products than this share of the existing store is taken
+# to be broken (layout change, block page) and the store is left as it is
+MIN_LISTING_RATIO = float(os.environ.get("KFC_MIN_LISTING_RATIO", "0.5"))
+
+
+def normalize_name(name):
+    """Normalize a product name for lookups (NFKC, casefold, single spaces)"""
+    if not name:
+        return ""
+    text = unicodedata.normalize("NFKC", name).casefold()
+    return " ".join(text.split())
+
+
+class ProductStore:
+    """Local product-detail store keyed by product id and normalized name
+
+    The store is a JSON file written by the batch crawl below. Lookups are
+    plain dict hits (plus a NameIndex for typos and Thai spellings, and an
+    AttributeIndex for price/category/piece filters); the file is reloaded
+    when its mtime changes so a fresh crawl is picked up without restarting
+    the webhook.
+    """
+
+    def __init__(self, path=PRODUCT_STORE_PATH):
+        self.path = path
+        # (by_id, by_name, name_index, attribute_index), replaced as a whole on reload
+        self._indexes = ({}, {}, NameIndex(()), AttributeIndex(()))
+        self._complete = False
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.reload_if_changed()
+
+    def __len__(self):
+        return len(self._indexes[0])
+
+    def _index(self, products):
+        by_id = {}
+        by_name = {}
+        for record in products:
+            by_id[record["id"]] = record
+            by_name.setdefault(normalize_name(record["name"]), record)
+        return by_id, by_name, NameIndex(products), AttributeIndex(products)
+
+    def reload_if_changed(self):
+        """Reload the store from disk if the file changed since the last load"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                products = data.get("products", [])
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load product store '{self.path}': {str(e)}")
+                return False
+            # Swap all indexes in one assignment so readers never see a mix
+            self._indexes = self._index(products)
+            self._complete = bool(data.get("complete"))
+            self._mtime = mtime
+            logger.info(f"Loaded {len(products)} products from '{self.path}'")
+            return True
+
+    def get(self, product_id):
+        """Return the stored record for a product id, or None"""
+        self.reload_if_changed()
+        return self._indexes[0].get(product_id)
+
+    def find_by_name(self, name):
+        """Return the stored record whose normalized name matches, or None"""
+        self.reload_if_changed()
+        return self._indexes[1].get(normalize_name(name))
+
+    def resolve(self, text):
+        """Return the stored record best matching free-form user text, or None"""
+        self.reload_if_changed()
+        by_id, by_name, name_index, _ = self._indexes
+        record = by_name.get(normalize_name(text))
+        if record is not None:
+            return record
+        match = name_index.resolve(text)
+        return by_id.get(match.product_id) if match else None
+
+    def name_index(self):
+        """Return the NameIndex built from the current store contents"""
+        self.reload_if_changed()
+        return self._indexes[2]
+
+    def attribute_index(self):
+        """Return the AttributeIndex built from the current store contents"""
+        self.reload_if_changed()
+        return self._indexes[3]
+
+    def is_complete(self):
+        """True when the crawl that wrote the store listed every menu category"""
+        self.reload_if_changed()
+        return self._complete
+
+    def records(self):
+        """Return every stored record"""
+        self.reload_if_changed()
+        return list(self._indexes[0].values())
+
+    def save(self, products, complete=False):
+        """Atomically replace the store file with the given records
+
+        complete says every menu category was listed, i.e. a product missing
+        from the store is not on the menu either.
+        """
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generated_at": time.time(), "complete": complete, "products": products},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+        self.reload_if_changed()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store():
+    """The process-wide ProductStore for PRODUCT_STORE_PATH
+
+    The webhook and the live scraper share this one instance, so its indexes
+    are built once (before the fork under gunicorn) instead of once per user.
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = ProductStore()
+    return _default_store
+
+
+def card_fingerprint(card):
+    """Hash of what the listing shows for a card: name, image URL and badge/price text"""
+    image = (card.get("image") or "").split("?", 1)[0]
+    payload = "\x1f".join([card.get("name") or "", image, card.get("badge") or ""])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def make_record(product_id, name, url, product_info, formatted, fingerprint=None, attributes=None, category=None):
+    """Build a store record for one crawled product
+
+    attributes is the product's MenuAttributes (price, pieces, category, sides);
+    category is the menu listing it was crawled from ("meals", "buckets", ...).
+    """
+    return {
+        "id": product_id,
+        "name": name,
+        "url": url,
+        "category": category,
+        "info": product_info,
+        "formatted": formatted,
+        "attributes": attributes._asdict() if attributes else None,
+        "fingerprint": fingerprint,
+        "crawled_at": time.time(),
+    }
+
+
+def crawl_product_store(path=PRODUCT_STORE_PATH, headless=True, full=False, max_age=DETAIL_MAX_AGE,
+                        min_ratio=MIN_LISTING_RATIO, categories=None):
+    """Re-crawl detail pages whose listing card changed or whose entry expired
+
+    Every menu listing the catalog crawl covers (crawl_catalog.CATEGORIES
+    unless categories is given) is read, so the store holds the same
+    products as the menu carousel. Unchanged, fresh products are carried
+    over from the existing store, and so are the products of a listing that
+    failed to load. With full=True every detail page is visited. Returns a
+    report with counts of added, changed, expired, removed, skipped and
+    failed products (a detail page with nothing to extract counts as failed
+    and keeps the old record) plus the listings that failed. If the listings
+    have no cards, or fewer than min_ratio of the stored products, the store
+    is not touched and the report has aborted=True.
+    """
+    # Imported here so webhook processes that only read the store never load selenium
+    from crawl_catalog import CATEGORIES, crawl_category
+    from scrap_detail import (
+        EmptyProductPage, extract_product_info, format_product_info, has_product_details,
+        launch_parked_driver, product_url_for_id,
+    )
+    from snapshot_archive import archive_page
+
+    categories = CATEGORIES if categories is None else categories
+    existing = {record["id"]: record for record in ProductStore(path).records()}
+    report = {"added": 0, "changed": 0, "expired": 0, "removed": 0, "skipped": 0, "failed": 0, "aborted": False,
+              "failed_categories": []}
+    now = time.time()
+
+    driver = launch_parked_driver(headless=headless)
+    products = []
+    try:
+        cards = []
+        for category in categories:
+            try:
+                # Scrolls until every lazy-loaded card is in; images are part of the fingerprint
+                cards.extend(crawl_category(driver, category))
+            except Exception as e:
+                logger.warning(f"Failed to list category '{category}': {str(e)}")
+                report["failed_categories"].append(category)
+        logger.info(f"Found {len(cards)} product cards in "
+                    f"{len(categories) - len(report['failed_categories'])}/{len(categories)} categories")
+
+        # Stores crawled before records had a category only listed /menu/meals
+        listed_ids = {card["id"] for card in cards}
+        carried = [
+            record for record in existing.values()
+            if record["id"] not in listed_ids and (record.get("category") or "meals") in report["failed_categories"]
+        ]
+        listed = len(listed_ids) + len(carried)
+        if not listed_ids or listed < len(existing) * min_ratio:
+            # Saving now would report every product removed and empty the webhook's store
+            logger.error(f"❌ Listing has {listed} products but the store has {len(existing)}; "
+                         f"leaving '{path}' unchanged")
+            report["aborted"] = True
+            return report
+
+        seen = set()
+        for card in cards:
+            # A product listed under several categories is crawled once, under the first
+            if card["id"] in seen:
+                continue
+            seen.add(card["id"])
+
+            fingerprint = card_fingerprint(card)
+            old = existing.get(card["id"])
+            if old is None:
+                status = "added"
+            elif old.get("fingerprint") != fingerprint:
+                status = "changed"
+            elif full or now - old.get("crawled_at", 0) >= max_age:
+                status = "expired"
+            else:
+                old["category"] = card["category"]
+                # Re-parsed from the stored info, so records crawled before the
+                # category was known pick it up without a detail page visit
+                old["attributes"] = parse_attributes(
+                    old["name"], old.get("info"), listing_text=card.get("badge"), category=card["category"]
+                )._asdict()
+                products.append(old)
+                report["skipped"] += 1
+                continue
+
+            url = product_url_for_id(card["id"], card["category"])
+            try:
+                driver.get(url)
+                product_info = extract_product_info(driver)
+                archive_page(url, driver.page_source, kind="product")
+                formatted = format_product_info(product_info, card["name"])
+                if not has_product_details(formatted, card["name"]):
+                    raise EmptyProductPage(f"nothing to extract from {url}")
+                # The listing's price text covers detail pages whose price selector found nothing
+                attributes = parse_attributes(card["name"], product_info, listing_text=card.get("badge"),
+                                              category=card["category"])
+            except Exception as e:
+                logger.warning(f"Skipping {card['id']} ({card['name']}): {str(e)}")
+                report["failed"] += 1
+                if old is not None:
+                    products.append(old)
+                continue
+            products.append(make_record(card["id"], card["name"], url, product_info, formatted, fingerprint,
+                                        attributes, category=card["category"]))
+            report[status] += 1
+            logger.info(f"Crawled ({status}) {len(products)}/{len(cards)}: {card['name']}")
+    finally:
+        driver.quit()
+
+    products.extend(carried)
+    report["skipped"] += len(carried)
+    report["removed"] = len(set(existing) - seen - {record["id"] for record in carried})
+    ProductStore(path).save(products, complete=not report["failed_categories"])
+    logger.info(f"✅ Saved {len(products)} products to '{path}': {report}")
+    return report
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    report = crawl_product_store(full="--full" in sys.argv[1:])
+    sys.exit(1 if report["aborted"] else 0)
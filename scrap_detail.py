@@ -1,334 +1,669 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import chromedriver_autoinstaller
-import time
-import re
-import logging
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-def setup_chrome_driver(headless=True):
-    """Setup Chrome driver with optimized options"""
-    chromedriver_autoinstaller.install()
-    
-    chrome_options = Options()
-    if headless:
-        chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-    
-    return webdriver.Chrome(options=chrome_options)
-
-def wait_for_page_load(driver, timeout=10):
-    """Wait for page to fully load"""
-    try:
-        WebDriverWait(driver, timeout).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
-        )
-        time.sleep(2)  # Additional wait for dynamic content
-    except TimeoutException:
-        logger.warning("Page load timeout, proceeding anyway")
-
-def handle_cookie_popup(driver):
-    """Handle cookie acceptance popup"""
-    try:
-        cookie_button = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
-        )
-        cookie_button.click()
-        logger.info("Cookie popup accepted")
-        time.sleep(1)
-    except TimeoutException:
-        logger.info("No cookie popup found or already accepted")
-    except Exception as e:
-        logger.warning(f"Error handling cookie popup: {str(e)}")
-
-def find_product_element(driver, product_name, timeout=15):
-    """Find product element with multiple search strategies"""
-    search_strategies = [
-        # Exact match
-        f"//div[contains(@class,'menu-product-header') and normalize-space(text())='{product_name}']",
-        # Case insensitive
-        f"//div[contains(@class,'menu-product-header') and translate(normalize-space(text()), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')='{product_name.lower()}']",
-        # Contains match
-        f"//div[contains(@class,'menu-product-header') and contains(normalize-space(text()), '{product_name}')]",
-        # Alternative class names
-        f"//h3[contains(@class,'product-title') and contains(normalize-space(text()), '{product_name}')]",
-        f"//div[contains(@class,'product-name') and contains(normalize-space(text()), '{product_name}')]"
-    ]
-    
-    for i, xpath in enumerate(search_strategies, 1):
-        try:
-            logger.info(f"Trying search strategy {i} for product: {product_name}")
-            element = WebDriverWait(driver, timeout if i == 1 else 5).until(
-                EC.presence_of_element_located((By.XPATH, xpath))
-            )
-            logger.info(f"Found product using strategy {i}")
-            return element
-        except TimeoutException:
-            continue
-    
-    raise TimeoutException(f"Product '{product_name}' not found with any search strategy")
-
-def extract_product_info(driver):
-    """Extract product information from detail page"""
-    product_info = {
-        'badge_text': '',
-        'price': '',
-        'description': '',
-        'ingredients': '',
-        'nutrition_info': ''
-    }
-    
-    try:
-        # Wait for page to load
-        wait_for_page_load(driver)
-        
-        # Extract badge/tag information
-        try:
-            badge_elements = driver.find_elements(By.CLASS_NAME, "textbadgecontainer")
-            if not badge_elements:
-                # Try alternative selectors
-                badge_elements = driver.find_elements(By.CSS_SELECTOR, ".badge, .tag, .label, [class*='badge'], [class*='tag']")
-            
-            if badge_elements:
-                badge_texts = []
-                for badge in badge_elements:
-                    text = badge.text.strip()
-                    if text:
-                        badge_texts.append(text)
-                product_info['badge_text'] = ' | '.join(badge_texts)
-                logger.info(f"Found badges: {product_info['badge_text']}")
-        except Exception as e:
-            logger.warning(f"Error extracting badges: {str(e)}")
-        
-        # Extract price
-        try:
-            price_selectors = [
-                ".price",
-                "[class*='price']",
-                ".product-price",
-                "[data-testid*='price']"
-            ]
-            
-            for selector in price_selectors:
-                price_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for price_elem in price_elements:
-                    price_text = price_elem.text.strip()
-                    if price_text and ('₿' in price_text or 'บาท' in price_text or price_text.replace('.', '').replace(',', '').isdigit()):
-                        product_info['price'] = price_text
-                        break
-                if product_info['price']:
-                    break
-        except Exception as e:
-            logger.warning(f"Error extracting price: {str(e)}")
-        
-        # Extract description
-        try:
-            desc_selectors = [
-                ".product-description",
-                "[class*='description']",
-                ".product-detail",
-                "[class*='detail']"
-            ]
-            
-            for selector in desc_selectors:
-                desc_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for desc_elem in desc_elements:
-                    desc_text = desc_elem.text.strip()
-                    if desc_text and len(desc_text) > 20:  # Meaningful description
-                        product_info['description'] = desc_text[:200]  # Limit length
-                        break
-                if product_info['description']:
-                    break
-        except Exception as e:
-            logger.warning(f"Error extracting description: {str(e)}")
-        
-        # Extract ingredients if available
-        try:
-            ingredient_keywords = ['ingredient', 'ส่วนประกอบ', 'วัตถุดิบ']
-            for keyword in ingredient_keywords:
-                elements = driver.find_elements(By.XPATH, f"//*[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{keyword.lower()}')]")
-                for elem in elements:
-                    text = elem.text.strip()
-                    if text and len(text) > 10:
-                        product_info['ingredients'] = text[:150]
-                        break
-                if product_info['ingredients']:
-                    break
-        except Exception as e:
-            logger.warning(f"Error extracting ingredients: {str(e)}")
-    
-    except Exception as e:
-        logger.error(f"Error extracting product information: {str(e)}")
-    
-    return product_info
-
-def clean_text(text):
-    """Clean and format extracted text"""
-    if not text:
-        return ""
-    
-    # Remove HTML tags if any
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # Clean up whitespace
-    text = ' '.join(text.split())
-    
-    # Remove special characters but keep Thai characters
-    text = re.sub(r'[^\w\s\u0E00-\u0E7F.,!?()-]', '', text)
-    
-    return text.strip()
-
-def format_product_info(product_info, product_name):
-    """Format product information for display"""
-    formatted_parts = []
-    
-    # Format badge/components information
-    if product_info.get('badge_text'):
-        badge_text = clean_text(product_info['badge_text'])
-        
-        # Split components and format nicely
-        components = []
-        
-        # Check if badge_text contains | separator (which is already parsed correctly)
-        if '|' in badge_text:
-            parts = [part.strip() for part in badge_text.split('|')]
-            for part in parts:
-                if part:
-                    components.append(f"• {part}")
-        elif 'PCS.' in badge_text.upper() or 'SIDE ITEM' in badge_text.upper():
-            # Split by number patterns and side items
-            parts = re.split(r'(?=\d+\s*PCS\.)|(?=SIDE\s*ITEM)', badge_text, flags=re.IGNORECASE)
-            
-            for part in parts:
-                part = part.strip()
-                if part:
-                    # Clean up component text
-                    part = re.sub(r'\s+', ' ', part)
-                    components.append(f"• {part}")
-        else:
-            # Try to split by multiple spaces or other patterns
-            if '•' in badge_text:
-                parts = badge_text.split('•')
-            else:
-                # Try to split by multiple spaces
-                parts = re.split(r'\s{2,}', badge_text)
-            
-            for part in parts:
-                part = part.strip()
-                if part:
-                    components.append(f"• {part}")
-        
-        if components:
-            formatted_parts.append("🍗 ในชุดประกอบด้วย:")
-            # Join components with line breaks
-            formatted_parts.append("\n".join(components))
-    
-    # Format price (if available)
-    if product_info.get('price'):
-        price_text = clean_text(product_info['price'])
-        if price_text and not 'choose a store' in price_text.lower():
-            formatted_parts.append(f"💰 ราคา: {price_text}")
-    
-    # Format description (clean up generic text)
-    if product_info.get('description'):
-        desc_text = clean_text(product_info['description'])
-        # Remove generic store selection text and product name repetition
-        if 'choose a store and order mode' in desc_text.lower():
-            desc_parts = desc_text.split('Choose a store')[0].strip()
-            # Check if description is just the product name
-            if desc_parts and len(desc_parts) > 10 and desc_parts.upper() != product_name.upper():
-                formatted_parts.append(f"📝 รายละเอียด: {desc_parts}")
-        elif len(desc_text) > 10 and desc_text.upper() != product_name.upper():
-            formatted_parts.append(f"📝 รายละเอียด: {desc_text}")
-    
-    # Format ingredients
-    if product_info.get('ingredients'):
-        ingredients_text = clean_text(product_info['ingredients'])
-        formatted_parts.append(f"🥘 ส่วนประกอบ: {ingredients_text}")
-    
-    if not formatted_parts:
-        return f"พบเมนู '{product_name}' แต่ไม่สามารถดึงข้อมูลรายละเอียดได้"
-    
-    # Join all parts with double line breaks for better spacing
-    return "\n\n".join(formatted_parts)
-
-def open_product_page_by_name_and_get_badge(product_name: str, headless=True):
-    """
-    Main function to scrape product details from KFC website
-    Returns formatted text instead of raw HTML
-    """
-    driver = None
-    try:
-        logger.info(f"Starting scrape for product: {product_name}")
-        
-        # Setup driver
-        driver = setup_chrome_driver(headless=headless)
-        
-        # Navigate to menu page
-        menu_url = "https://www.kfc.co.th/menu/meals"
-        logger.info(f"Navigating to: {menu_url}")
-        driver.get(menu_url)
-        
-        # Handle cookie popup
-        handle_cookie_popup(driver)
-        
-        # Wait for page to load
-        wait_for_page_load(driver)
-        
-        # Find product element
-        name_element = find_product_element(driver, product_name)
-        
-        # Find product card and get ID
-        try:
-            product_card = name_element.find_element(By.XPATH, "./ancestor::div[contains(@class,'plp-item-card')]")
-            product_id = product_card.get_attribute("id")
-            
-            if not product_id:
-                raise NoSuchElementException("Product ID not found")
-                
-        except NoSuchElementException:
-            # Try alternative method to get product URL
-            try:
-                product_link = name_element.find_element(By.XPATH, "./ancestor::a | ./following-sibling::a | ./preceding-sibling::a")
-                product_url = product_link.get_attribute("href")
-            except NoSuchElementException:
-                raise Exception(f"Could not find product link for '{product_name}'")
-        else:
-            # Build product URL from ID
-            product_url = f"https://www.kfc.co.th/menu/meals/{product_id}-prod"
-        
-        logger.info(f"Product URL: {product_url}")
-        
-        # Navigate to product detail page
-        driver.get(product_url)
-        
-        # Extract product information
-        product_info = extract_product_info(driver)
-        
-        # Format the information
-        formatted_info = format_product_info(product_info, product_name)
-        
-        logger.info("✅ Product information extracted successfully")
-        driver.quit()
-        return formatted_info, driver
-        
-    except TimeoutException as e:
-        error_msg = f"ไม่พบเมนู '{product_name}' ในระบบ หรือเซิร์ฟเวอร์ตอบสนองช้า"
-        logger.error(f"Timeout error: {str(e)}")
-        return error_msg, driver
-        
-    except Exception as e:
-        error_msg = f"เกิดข้อผิดพลาดในการค้นหา '{product_name}': {str(e)}"
-        logger.error(f"Scraping error: {str(e)}")
-        return error_msg, driver
\ No newline at end of file
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import atexit
+import fnmatch
+import os
+import threading
+import time
+import re
+import logging
+from driver_pool import DriverPool
+from product_store import default_store
+from metrics import SCRAPE_STAGE_SECONDS, SCRAPES_TOTAL
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Point KFC_BASE_URL at a local stand-in server to crawl saved pages
+KFC_BASE_URL = os.environ.get("KFC_BASE_URL", "https://www.kfc.co.th").rstrip("/")
+MENU_URL = f"{KFC_BASE_URL}/menu/meals"
+
+# Warm driver pool settings (override with environment variables)
+DRIVER_POOL_SIZE = int(os.environ.get("KFC_DRIVER_POOL_SIZE", "2"))
+DRIVER_MAX_PAGES = int(os.environ.get("KFC_DRIVER_MAX_PAGES", "50"))
+DRIVER_MAX_MEMORY_MB = int(os.environ.get("KFC_DRIVER_MAX_MEMORY_MB", "512"))
+
+# Heavy resources we never read. Chrome's URL blocklist is wildcard-only.
+RESOURCE_BLOCK_PATTERNS = {
+    "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico", "*.ico?*", "*images.ctfassets.net*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*videos.ctfassets.net*"],
+    "fonts": ["*.woff*", "*.ttf*", "*.otf*", "*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    "trackers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+        "*connect.facebook.com*", "*hotjar.com*", "*tiktok.com*", "*clarity.ms*", "*adservice.google.*",
+    ],
+}
+
+# Profiles pick which groups above are blocked (KFC_BLOCK_PROFILE selects one)
+RESOURCE_BLOCK_PROFILES = {
+    "none": [],
+    "trackers": ["trackers"],
+    "default": ["images", "media", "fonts", "trackers"],
+}
+RESOURCE_BLOCK_PROFILE = os.environ.get("KFC_BLOCK_PROFILE", "default")
+
+# URLs the site needs to render product cards; any block pattern matching one is dropped
+RESOURCE_ALLOWLIST = [url for url in os.environ.get("KFC_BLOCK_ALLOW", "").split(",") if url]
+
+# Set CHROMEDRIVER_PATH to use a preinstalled driver and skip version detection entirely
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+class ScrapeError(Exception):
+    """A failed product scrape; the message is the user-facing (Thai) error text"""
+
+class EmptyProductPage(Exception):
+    """A detail page loaded but nothing could be extracted from it (e.g. an error page)"""
+
+# What format_product_info returns when the page had none of the fields it shows
+NO_DETAILS_TEXT = "พบเมนู '{name}' แต่ไม่สามารถดึงข้อมูลรายละเอียดได้"
+
+def blocked_url_patterns(profile=RESOURCE_BLOCK_PROFILE, allowlist=RESOURCE_ALLOWLIST):
+    """Return the URL patterns to block for a profile, minus those hitting the allowlist"""
+    patterns = []
+    for group in RESOURCE_BLOCK_PROFILES[profile]:
+        patterns.extend(RESOURCE_BLOCK_PATTERNS[group])
+    # The blocklist has no exceptions, so a pattern that would catch an allowed URL can't be used
+    return [p for p in patterns if not any(fnmatch.fnmatchcase(url, p) for url in allowlist)]
+
+def apply_resource_blocking(driver, profile=RESOURCE_BLOCK_PROFILE, allowlist=RESOURCE_ALLOWLIST):
+    """Block heavy resources for every later page load through Chrome DevTools"""
+    patterns = blocked_url_patterns(profile, allowlist)
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        logger.info(f"Blocking {len(patterns)} URL patterns (profile '{profile}')")
+    except Exception as e:
+        logger.warning(f"Could not enable resource blocking: {str(e)}")
+
+def measure_page_load(driver, url):
+    """Load url and return its transferred bytes, request count and load time (ms)"""
+    driver.get(url)
+    wait_for_page_load(driver)
+    return driver.execute_script("""
+        var nav = performance.getEntriesByType('navigation')[0];
+        var resources = performance.getEntriesByType('resource');
+        var bytes = resources.reduce(function (sum, r) { return sum + (r.transferSize || 0); }, 0);
+        return {
+            url: location.href,
+            requests: resources.length + 1,
+            bytes: bytes + (nav ? nav.transferSize : 0),
+            load_ms: nav ? Math.round(nav.loadEventEnd - nav.startTime) : null
+        };
+    """)
+
+def resolve_chromedriver():
+    """Return the chromedriver binary path, resolved once per process
+
+    chromedriver_autoinstaller.install() runs the Chrome binary, asks the
+    Chrome for Testing index for the matching driver and checks it on disk,
+    so it only runs on the first call. "" means it found nothing and
+    Selenium should locate a driver itself.
+    """
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            if CHROMEDRIVER_PATH:
+                _chromedriver_path = CHROMEDRIVER_PATH
+            else:
+                import chromedriver_autoinstaller
+                _chromedriver_path = chromedriver_autoinstaller.install() or ""
+            logger.info(f"Using chromedriver at {_chromedriver_path or '(Selenium Manager)'}")
+        return _chromedriver_path
+
+def chrome_service():
+    """A Service for the resolved driver, so Selenium Manager doesn't look it up again"""
+    return Service(executable_path=resolve_chromedriver() or None)
+
+@SCRAPE_STAGE_SECONDS.time(stage="driver_startup")
+def setup_chrome_driver(headless=True, block_profile=RESOURCE_BLOCK_PROFILE):
+    """Setup Chrome driver with optimized options"""
+    
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+    
+    driver = webdriver.Chrome(service=chrome_service(), options=chrome_options)
+    apply_resource_blocking(driver, block_profile)
+    return driver
+
+@SCRAPE_STAGE_SECONDS.time(stage="wait_for_page_load")
+def wait_for_page_load(driver, timeout=10):
+    """Wait for page to fully load"""
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        time.sleep(2)  # Additional wait for dynamic content
+    except TimeoutException:
+        logger.warning("Page load timeout, proceeding anyway")
+
+@SCRAPE_STAGE_SECONDS.time(stage="cookie_popup")
+def handle_cookie_popup(driver):
+    """Handle cookie acceptance popup"""
+    try:
+        cookie_button = WebDriverWait(driver, 5).until(
+            EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
+        )
+        cookie_button.click()
+        logger.info("Cookie popup accepted")
+        time.sleep(1)
+    except TimeoutException:
+        logger.info("No cookie popup found or already accepted")
+    except Exception as e:
+        logger.warning(f"Error handling cookie popup: {str(e)}")
+
+def park_on_menu_page(driver, accept_cookies=False):
+    """Navigate a driver to the menu page and wait until it is ready"""
+    with SCRAPE_STAGE_SECONDS.time(stage="page_get"):
+        driver.get(MENU_URL)
+    if accept_cookies:
+        handle_cookie_popup(driver)
+    wait_for_page_load(driver)
+
+def launch_parked_driver(headless=True):
+    """Start a new driver parked on the menu page with cookies accepted"""
+    driver = setup_chrome_driver(headless=headless)
+    try:
+        park_on_menu_page(driver, accept_cookies=True)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+def get_driver_pool():
+    """Return the process-wide warm driver pool, creating it on first use"""
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            _driver_pool = DriverPool(
+                create_driver=launch_parked_driver,
+                park_driver=park_on_menu_page,
+                size=DRIVER_POOL_SIZE,
+                max_pages=DRIVER_MAX_PAGES,
+                max_memory_mb=DRIVER_MAX_MEMORY_MB,
+            )
+            atexit.register(_driver_pool.close)
+        return _driver_pool
+
+def collect_product_cards(driver):
+    """Return [{'id', 'name', 'image', 'badge'}] for every plp-item-card on the loaded menu page
+
+    badge is the card's ribbon and price/KJ text as shown on the listing.
+    """
+    cards = driver.execute_script("""
+        function text(card, selector) {
+            return Array.from(card.querySelectorAll(selector)).map(function (el) {
+                return el.textContent.trim();
+            }).filter(Boolean).join(' | ');
+        }
+        return Array.from(document.querySelectorAll('div.plp-item-card')).map(function (card) {
+            var header = card.querySelector('.small-menu-product-header');
+            var image = card.querySelector('img.small-menu-product-image');
+            return {
+                id: card.id,
+                name: header ? header.textContent.trim() : '',
+                image: image ? image.getAttribute('src') : '',
+                badge: text(card, '.discount-ribbon-text, .Price-and-KJ-info')
+            };
+        });
+    """)
+    return [card for card in cards if card.get('id') and card.get('name')]
+
+def product_url_for_id(product_id, category=None):
+    """Build the detail page URL for a plp-item-card id listed under a menu category (default meals)"""
+    listing = f"{KFC_BASE_URL}/menu/{category}" if category else MENU_URL
+    return f"{listing}/{product_id}-prod"
+
+def get_product_store():
+    """Return the crawled product store used to resolve names to product ids (shared with the webhook)"""
+    return default_store()
+
+def resolve_product_page(product_name):
+    """Resolve user text to (detail URL, canonical name) via the name index, or None"""
+    match = get_product_store().name_index().resolve(product_name)
+    if match is None:
+        return None
+    logger.info(f"Resolved '{product_name}' to {match.product_id} ({match.name}, score {match.score})")
+    return match.url or product_url_for_id(match.product_id), match.name
+
+@SCRAPE_STAGE_SECONDS.time(stage="find_product_element")
+def find_product_element(driver, product_name, timeout=15):
+    """Find product element with multiple search strategies"""
+    search_strategies = [
+        # Exact match
+        f"//div[contains(@class,'menu-product-header') and normalize-space(text())='{product_name}']",
+        # Case insensitive
+        f"//div[contains(@class,'menu-product-header') and translate(normalize-space(text()), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')='{product_name.lower()}']",
+        # Contains match
+        f"//div[contains(@class,'menu-product-header') and contains(normalize-space(text()), '{product_name}')]",
+        # Alternative class names
+        f"//h3[contains(@class,'product-title') and contains(normalize-space(text()), '{product_name}')]",
+        f"//div[contains(@class,'product-name') and contains(normalize-space(text()), '{product_name}')]"
+    ]
+    
+    for i, xpath in enumerate(search_strategies, 1):
+        try:
+            logger.info(f"Trying search strategy {i} for product: {product_name}")
+            element = WebDriverWait(driver, timeout if i == 1 else 5).until(
+                EC.presence_of_element_located((By.XPATH, xpath))
+            )
+            logger.info(f"Found product using strategy {i}")
+            return element
+        except TimeoutException:
+            continue
+    
+    raise TimeoutException(f"Product '{product_name}' not found with any search strategy")
+
+# Runs in the page and returns every field extract_product_info needs in one
+# round trip. Mirrors extract_product_info_webdriver: same selectors in the same
+# order, same keyword XPath, and (like WebElement.text) ignores hidden elements.
+EXTRACT_PRODUCT_INFO_JS = """
+    function visibleText(el) {
+        if (!el.getClientRects().length) {
+            return '';
+        }
+        return (el.innerText || '').trim();
+    }
+    function all(selector) {
+        return Array.from(document.querySelectorAll(selector));
+    }
+    function firstText(selectors, accept) {
+        for (var i = 0; i < selectors.length; i++) {
+            var elements = all(selectors[i]);
+            for (var j = 0; j < elements.length; j++) {
+                var text = visibleText(elements[j]);
+                if (text && accept(text)) {
+                    return text;
+                }
+            }
+        }
+        return '';
+    }
+
+    var badges = all('.textbadgecontainer');
+    if (!badges.length) {
+        badges = all(".badge, .tag, .label, [class*='badge'], [class*='tag']");
+    }
+
+    var price = firstText(arguments[0], function (text) {
+        return text.indexOf('₿') !== -1 || text.indexOf('บาท') !== -1 || /^[0-9]+$/.test(text.replace(/[.,]/g, ''));
+    });
+    var description = firstText(arguments[1], function (text) {
+        return text.length > 20;
+    });
+
+    var ingredients = '';
+    for (var k = 0; k < arguments[2].length && !ingredients; k++) {
+        var xpath = "//*[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '" + arguments[2][k] + "')]";
+        var snapshot = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var n = 0; n < snapshot.snapshotLength; n++) {
+            var text = visibleText(snapshot.snapshotItem(n));
+            if (text && text.length > 10) {
+                ingredients = text.slice(0, 150);
+                break;
+            }
+        }
+    }
+
+    return {
+        badge_text: badges.map(visibleText).filter(Boolean).join(' | '),
+        price: price,
+        description: description.slice(0, 200),
+        ingredients: ingredients,
+        nutrition_info: ''
+    };
+"""
+
+PRICE_SELECTORS = [
+    ".price",
+    "[class*='price']",
+    ".product-price",
+    "[data-testid*='price']"
+]
+
+DESCRIPTION_SELECTORS = [
+    ".product-description",
+    "[class*='description']",
+    ".product-detail",
+    "[class*='detail']"
+]
+
+INGREDIENT_KEYWORDS = ['ingredient', 'ส่วนประกอบ', 'วัตถุดิบ']
+
+def extract_product_info(driver):
+    """Extract product information from detail page in a single script round trip"""
+    try:
+        # Wait for page to load
+        wait_for_page_load(driver)
+    except Exception as e:
+        logger.error(f"Error waiting for product page: {str(e)}")
+
+    # Timed separately from the page-load wait above, which has its own stage
+    with SCRAPE_STAGE_SECONDS.time(stage="extract_product_info"):
+        try:
+            product_info = extract_product_info_in_page(driver)
+        except Exception as e:
+            logger.warning(f"In-page extraction failed, falling back to element lookups: {str(e)}")
+            return extract_product_info_webdriver(driver)
+
+    if product_info['badge_text']:
+        logger.info(f"Found badges: {product_info['badge_text']}")
+    return product_info
+
+def extract_product_info_in_page(driver):
+    """Run EXTRACT_PRODUCT_INFO_JS on the loaded page and return its product_info dict"""
+    return driver.execute_script(
+        EXTRACT_PRODUCT_INFO_JS,
+        PRICE_SELECTORS,
+        DESCRIPTION_SELECTORS,
+        [keyword.lower() for keyword in INGREDIENT_KEYWORDS]
+    )
+
+def extract_product_info_webdriver(driver):
+    """Extract product information with one WebDriver call per element (fallback path)"""
+    product_info = {
+        'badge_text': '',
+        'price': '',
+        'description': '',
+        'ingredients': '',
+        'nutrition_info': ''
+    }
+    
+    try:
+        # Extract badge/tag information
+        try:
+            badge_elements = driver.find_elements(By.CLASS_NAME, "textbadgecontainer")
+            if not badge_elements:
+                # Try alternative selectors
+                badge_elements = driver.find_elements(By.CSS_SELECTOR, ".badge, .tag, .label, [class*='badge'], [class*='tag']")
+            
+            if badge_elements:
+                badge_texts = []
+                for badge in badge_elements:
+                    text = badge.text.strip()
+                    if text:
+                        badge_texts.append(text)
+                product_info['badge_text'] = ' | '.join(badge_texts)
+                logger.info(f"Found badges: {product_info['badge_text']}")
+        except Exception as e:
+            logger.warning(f"Error extracting badges: {str(e)}")
+        
+        # Extract price
+        try:
+            for selector in PRICE_SELECTORS:
+                price_elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                for price_elem in price_elements:
+                    price_text = price_elem.text.strip()
+                    if price_text and ('₿' in price_text or 'บาท' in price_text or price_text.replace('.', '').replace(',', '').isdigit()):
+                        product_info['price'] = price_text
+                        break
+                if product_info['price']:
+                    break
+        except Exception as e:
+            logger.warning(f"Error extracting price: {str(e)}")
+        
+        # Extract description
+        try:
+            for selector in DESCRIPTION_SELECTORS:
+                desc_elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                for desc_elem in desc_elements:
+                    desc_text = desc_elem.text.strip()
+                    if desc_text and len(desc_text) > 20:  # Meaningful description
+                        product_info['description'] = desc_text[:200]  # Limit length
+                        break
+                if product_info['description']:
+                    break
+        except Exception as e:
+            logger.warning(f"Error extracting description: {str(e)}")
+        
+        # Extract ingredients if available
+        try:
+            for keyword in INGREDIENT_KEYWORDS:
+                elements = driver.find_elements(By.XPATH, f"//*[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{keyword.lower()}')]")
+                for elem in elements:
+                    text = elem.text.strip()
+                    if text and len(text) > 10:
+                        product_info['ingredients'] = text[:150]
+                        break
+                if product_info['ingredients']:
+                    break
+        except Exception as e:
+            logger.warning(f"Error extracting ingredients: {str(e)}")
+    
+    except Exception as e:
+        logger.error(f"Error extracting product information: {str(e)}")
+    
+    return product_info
+
+def clean_text(text):
+    """Clean and format extracted text"""
+    if not text:
+        return ""
+    
+    # Remove HTML tags if any
+    text = re.sub(r'<[^>]+>', '', text)
+    
+    # Clean up whitespace
+    text = ' '.join(text.split())
+    
+    # Remove special characters but keep Thai characters
+    text = re.sub(r'[^\w\s\u0E00-\u0E7F.,!?()-]', '', text)
+    
+    return text.strip()
+
+@SCRAPE_STAGE_SECONDS.time(stage="format_product_info")
+def format_product_info(product_info, product_name):
+    """Format product information for display"""
+    formatted_parts = []
+    
+    # Format badge/components information
+    if product_info.get('badge_text'):
+        badge_text = clean_text(product_info['badge_text'])
+        
+        # Split components and format nicely
+        components = []
+        
+        # Check if badge_text contains | separator (which is already parsed correctly)
+        if '|' in badge_text:
+            parts = [part.strip() for part in badge_text.split('|')]
+            for part in parts:
+                if part:
+                    components.append(f"• {part}")
+        elif 'PCS.' in badge_text.upper() or 'SIDE ITEM' in badge_text.upper():
+            # Split by number patterns and side items
+            parts = re.split(r'(?=\d+\s*PCS\.)|(?=SIDE\s*ITEM)', badge_text, flags=re.IGNORECASE)
+            
+            for part in parts:
+                part = part.strip()
+                if part:
+                    # Clean up component text
+                    part = re.sub(r'\s+', ' ', part)
+                    components.append(f"• {part}")
+        else:
+            # Try to split by multiple spaces or other patterns
+            if '•' in badge_text:
+                parts = badge_text.split('•')
+            else:
+                # Try to split by multiple spaces
+                parts = re.split(r'\s{2,}', badge_text)
+            
+            for part in parts:
+                part = part.strip()
+                if part:
+                    components.append(f"• {part}")
+        
+        if components:
+            formatted_parts.append("🍗 ในชุดประกอบด้วย:")
+            # Join components with line breaks
+            formatted_parts.append("\n".join(components))
+    
+    # Format price (if available)
+    if product_info.get('price'):
+        price_text = clean_text(product_info['price'])
+        if price_text and not 'choose a store' in price_text.lower():
+            formatted_parts.append(f"💰 ราคา: {price_text}")
+    
+    # Format description (clean up generic text)
+    if product_info.get('description'):
+        desc_text = clean_text(product_info['description'])
+        # Remove generic store selection text and product name repetition
+        if 'choose a store and order mode' in desc_text.lower():
+            desc_parts = desc_text.split('Choose a store')[0].strip()
+            # Check if description is just the product name
+            if desc_parts and len(desc_parts) > 10 and desc_parts.upper() != product_name.upper():
+                formatted_parts.append(f"📝 รายละเอียด: {desc_parts}")
+        elif len(desc_text) > 10 and desc_text.upper() != product_name.upper():
+            formatted_parts.append(f"📝 รายละเอียด: {desc_text}")
+    
+    # Format ingredients
+    if product_info.get('ingredients'):
+        ingredients_text = clean_text(product_info['ingredients'])
+        formatted_parts.append(f"🥘 ส่วนประกอบ: {ingredients_text}")
+    
+    if not formatted_parts:
+        return NO_DETAILS_TEXT.format(name=product_name)
+    
+    # Join all parts with double line breaks for better spacing
+    return "\n\n".join(formatted_parts)
+
+def has_product_details(formatted, product_name):
+    """False when format_product_info found nothing to show for the product"""
+    return formatted != NO_DETAILS_TEXT.format(name=product_name)
+
+def scrape_product_from_menu_page(driver, product_name):
+    """Find a product on the already loaded menu page and scrape its detail page"""
+    # Find product element
+    name_element = find_product_element(driver, product_name)
+
+    # Find product card and get ID
+    try:
+        product_card = name_element.find_element(By.XPATH, "./ancestor::div[contains(@class,'plp-item-card')]")
+        product_id = product_card.get_attribute("id")
+
+        if not product_id:
+            raise NoSuchElementException("Product ID not found")
+
+    except NoSuchElementException:
+        # Try alternative method to get product URL
+        try:
+            product_link = name_element.find_element(By.XPATH, "./ancestor::a | ./following-sibling::a | ./preceding-sibling::a")
+            product_url = product_link.get_attribute("href")
+        except NoSuchElementException:
+            raise Exception(f"Could not find product link for '{product_name}'")
+    else:
+        # Build product URL from ID
+        product_url = product_url_for_id(product_id)
+
+    return scrape_product_page(driver, product_url, product_name)
+
+def scrape_product_page(driver, product_url, product_name):
+    """Open a product detail page and return its formatted information"""
+    logger.info(f"Product URL: {product_url}")
+
+    # Navigate to product detail page
+    with SCRAPE_STAGE_SECONDS.time(stage="page_get"):
+        driver.get(product_url)
+
+    # Extract product information
+    product_info = extract_product_info(driver)
+
+    # Format the information
+    return format_product_info(product_info, product_name)
+
+def open_product_page_by_name_and_get_badge(product_name: str, headless=True, use_pool=True, raise_errors=False):
+    """
+    Main function to scrape product details from KFC website
+    Returns formatted text instead of raw HTML
+
+    With use_pool a warm driver is borrowed from the shared pool (headless is
+    then ignored) and None is returned in place of the driver, which stays
+    owned by the pool. Names found in the crawled name index go straight to
+    the detail page; only unknown names fall back to searching the menu page.
+
+    Failures are returned as error text unless raise_errors is set, in which
+    case ScrapeError is raised with that text (so callers can avoid caching it).
+    With raise_errors a detail page that yields no product fields is a failure
+    too, rather than the "no details" text format_product_info falls back to.
+    """
+    driver = None
+    try:
+        logger.info(f"Starting scrape for product: {product_name}")
+        resolved = resolve_product_page(product_name)
+        detail_name = resolved[1] if resolved else product_name
+
+        if use_pool:
+            pool = get_driver_pool()
+            with SCRAPE_STAGE_SECONDS.time(stage="driver_checkout"):
+                entry = pool.checkout()
+            try:
+                if resolved:
+                    formatted_info = scrape_product_page(entry.driver, *resolved)
+                else:
+                    formatted_info = scrape_product_from_menu_page(entry.driver, product_name)
+            finally:
+                pool.checkin(entry)
+        else:
+            # Setup driver
+            driver = setup_chrome_driver(headless=headless)
+
+            if resolved:
+                formatted_info = scrape_product_page(driver, *resolved)
+            else:
+                # Navigate to menu page
+                logger.info(f"Navigating to: {MENU_URL}")
+                park_on_menu_page(driver, accept_cookies=True)
+                formatted_info = scrape_product_from_menu_page(driver, product_name)
+            driver.quit()
+
+        if raise_errors and not has_product_details(formatted_info, detail_name):
+            # The page loaded but had no product fields (e.g. KFC served an error page);
+            # callers cache what is returned, so this must not come back as details
+            raise EmptyProductPage(f"No product details found for '{detail_name}'")
+
+        logger.info("✅ Product information extracted successfully")
+        SCRAPES_TOTAL.inc(result="ok")
+        return formatted_info, driver
+
+    except EmptyProductPage as e:
+        error_msg = f"ไม่สามารถดึงข้อมูลเมนู '{product_name}' ได้ในขณะนี้ กรุณาลองใหม่อีกครั้ง"
+        logger.error(str(e))
+        SCRAPES_TOTAL.inc(result="empty")
+        raise ScrapeError(error_msg) from e
+
+    except TimeoutException as e:
+        error_msg = f"ไม่พบเมนู '{product_name}' ในระบบ หรือเซิร์ฟเวอร์ตอบสนองช้า"
+        logger.error(f"Timeout error: {str(e)}")
+        SCRAPES_TOTAL.inc(result="timeout")
+        if raise_errors:
+            if driver:
+                driver.quit()
+            raise ScrapeError(error_msg) from e
+        return error_msg, driver
+
+    except Exception as e:
+        error_msg = f"เกิดข้อผิดพลาดในการค้นหา '{product_name}': {str(e)}"
+        logger.error(f"Scraping error: {str(e)}")
+        SCRAPES_TOTAL.inc(result="error")
+        if raise_errors:
+            if driver:
+                driver.quit()
+            raise ScrapeError(error_msg) from e
+        return error_msg, driver
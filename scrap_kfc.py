@@ -1,83 +1,71 @@
-import csv
-import time
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-from selenium import webdriver
-import chromedriver_autoinstaller
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-# Parameters
-url = "https://www.kfc.co.th/menu/meals"
-filename = "kfc_menu.csv"
-
-# Install ChromeDriver automatically
-chromedriver_autoinstaller.install()
-
-# Setup Chrome options
-chrome_options = webdriver.ChromeOptions()
-# chrome_options.add_argument('--headless')  # Enable headless mode if needed
-
-# Start browser
-driver = webdriver.Chrome(options=chrome_options)
-driver.get(url)
-
-# Accept cookies
-try:
-    wait = WebDriverWait(driver, 10)
-    accept_btn = wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
-    accept_btn.click()
-    print("✅ Accepted cookie popup.")
-except Exception as e:
-    print("⚠️ No cookie popup found:", e)
-
-# Wait for initial content
-time.sleep(3)
-
-# Scroll step-by-step using PAGE_DOWN key
-scroll_pause_time = 1
-scroll_step = 500  # เลื่อนทีละ 300px
-last_height = driver.execute_script("return document.body.scrollHeight")
-
-print("📜 Scrolling gradually...")
-
-while True:
-    # เลื่อนลงทีละนิด
-    driver.execute_script(f"window.scrollBy(0, {scroll_step});")
-    time.sleep(scroll_pause_time)
-
-    # ตรวจสอบความสูงของหน้า
-    new_height = driver.execute_script("return window.scrollY + window.innerHeight")
-    total_height = driver.execute_script("return document.body.scrollHeight")
-
-    print(f"🌀 Scrolled to {new_height} / {total_height}")
-
-    if new_height >= total_height:
-        print("✅ Reached bottom of page.")
-        break
-
-
-# Get page HTML
-html = driver.page_source
-soup = BeautifulSoup(html, 'html.parser')
-
-# Extract menu items
-menu_items = [div.get_text(strip=True) for div in soup.find_all("div", class_="small-menu-product-header")]
-
-# Extract image URLs
-images = soup.find_all("img", class_="false small-menu-product-image")
-image_urls = [urlparse(img.get("src"))._replace(query="").geturl() for img in images]
-
-# Close browser
-driver.quit()
-
-# Save to CSV
-with open(filename, "w", newline="", encoding="utf-8") as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(["Menu Item", "Image URL"])
-    for item, image in zip(menu_items, image_urls):
-        writer.writerow([item, image])
-
-print(f"✅ Saved {len(menu_items)} menu items to '{filename}'")
+import logging
+import sys
+from selenium import webdriver
+import chromedriver_autoinstaller
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from menu_parser import parse_menu_cards
+from lazy_scroll import scroll_until_loaded
+from snapshot_archive import archive_page
+from thumbnails import add_thumbnails
+from crawl_catalog import CATALOG_CSV_PATH, save_catalog_csv
+
+logging.basicConfig(level=logging.INFO)
+
+# Parameters
+url = "https://www.kfc.co.th/menu/meals"
+filename = CATALOG_CSV_PATH
+
+# Install ChromeDriver automatically
+chromedriver_autoinstaller.install()
+
+# Setup Chrome options
+chrome_options = webdriver.ChromeOptions()
+# chrome_options.add_argument('--headless')  # Enable headless mode if needed
+
+# Start browser
+driver = webdriver.Chrome(options=chrome_options)
+driver.get(url)
+
+# Accept cookies
+try:
+    wait = WebDriverWait(driver, 10)
+    accept_btn = wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
+    accept_btn.click()
+    print("✅ Accepted cookie popup.")
+except Exception as e:
+    print("⚠️ No cookie popup found:", e)
+
+# Wait for the first product card instead of a fixed sleep
+try:
+    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.plp-item-card")))
+except Exception as e:
+    print("⚠️ No product cards appeared:", e)
+
+# Scroll as fast as lazy-loaded cards appear; stops once the count stops growing
+print("📜 Scrolling until all cards are loaded...")
+scroll_summary = scroll_until_loaded(driver)
+print(f"✅ Reached bottom of page: {scroll_summary['cards']} cards in "
+      f"{scroll_summary['steps']} steps, {scroll_summary['seconds']}s")
+
+
+# Get page HTML and extract one record per product card
+html = driver.page_source
+archive_page(url, html, kind="menu")
+cards = parse_menu_cards(html)
+
+# Close browser
+driver.quit()
+
+# An empty page (layout change, block page) would empty the webhooks' menu
+if not cards:
+    print(f"❌ No menu items found; leaving '{filename}' unchanged")
+    sys.exit(1)
+
+# Save to CSV atomically, in the columns crawl_catalog.py writes
+products = [{"id": card.id, "name": card.name, "image_url": card.image_url, "category": "meals"} for card in cards]
+add_thumbnails(products)
+save_catalog_csv(products, filename)
+
+print(f"✅ Saved {len(cards)} menu items to '{filename}'")
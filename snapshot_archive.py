@@ -0,0 +1,278 @@
+"""Content-addressed archive of crawled pages, with offline re-extraction
+
+    python snapshot_archive.py list [url_prefix]
+    python snapshot_archive.py reextract menu_cards [--url-prefix URL] [--kind menu] [--workers 4]
+
+Every page a crawler loads is gzip-compressed and stored once under the
+SHA-256 of its HTML (identical pages share one object); a SQLite index records
+which URL had which content at what time. reextract runs an extractor over the
+stored snapshots across worker processes, with no browser and no network.
+Extractors are the names in EXTRACTORS or any importable "module:function"
+that takes the HTML and returns something JSON-serializable.
+"""
+import argparse
+import gzip
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Set KFC_SNAPSHOT_DIR to an empty string to stop crawlers from archiving pages
+SNAPSHOT_DIR = os.environ.get("KFC_SNAPSHOT_DIR", "kfc_snapshots")
+SNAPSHOT_WORKERS = int(os.environ.get("KFC_SNAPSHOT_WORKERS", str(os.cpu_count() or 1)))
+
+
+class SnapshotArchive:
+    """objects/<aa>/<sha256>.html.gz plus an index.sqlite3 of (url, fetched_at, digest)"""
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "url TEXT NOT NULL, fetched_at REAL NOT NULL, digest TEXT NOT NULL, "
+            "kind TEXT NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS snapshots_url ON snapshots (url, fetched_at)")
+        self._db.commit()
+
+    def object_path(self, digest):
+        return object_path(self.root, digest)
+
+    def store(self, url, html, kind="page", fetched_at=None):
+        """Archive one page and return its digest; unchanged content is not written again"""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb", compresslevel=9) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO snapshots (url, fetched_at, digest, kind, size) VALUES (?, ?, ?, ?, ?)",
+                (url, fetched_at if fetched_at is not None else time.time(), digest, kind, len(data))
+            )
+            self._db.commit()
+        return digest
+
+    def read(self, digest):
+        return read_object(self.root, digest)
+
+    def snapshots(self, url_prefix=None, kind=None, since=None, until=None):
+        """Index rows as dicts, oldest first, optionally filtered by URL prefix, kind and time range"""
+        query = "SELECT url, fetched_at, digest, kind, size FROM snapshots WHERE 1 = 1"
+        params = []
+        if url_prefix:
+            query += " AND substr(url, 1, ?) = ?"
+            params += [len(url_prefix), url_prefix]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if since is not None:
+            query += " AND fetched_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND fetched_at < ?"
+            params.append(until)
+        query += " ORDER BY fetched_at, rowid"
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [dict(zip(("url", "fetched_at", "digest", "kind", "size"), row)) for row in rows]
+
+    def latest(self, url):
+        """HTML of the most recent snapshot of url, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest FROM snapshots WHERE url = ? ORDER BY fetched_at DESC, rowid DESC LIMIT 1", (url,)
+            ).fetchone()
+        return self.read(row[0]) if row else None
+
+
+def object_path(root, digest):
+    return os.path.join(root, "objects", digest[:2], f"{digest}.html.gz")
+
+
+def read_object(root, digest):
+    with gzip.open(object_path(root, digest), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+_default_archive = None
+_default_archive_lock = threading.Lock()
+
+
+def archive_page(url, html, kind="page"):
+    """Store a crawled page in the default archive; never lets archiving break a crawl"""
+    global _default_archive
+    if not SNAPSHOT_DIR:
+        return None
+    try:
+        with _default_archive_lock:
+            if _default_archive is None:
+                _default_archive = SnapshotArchive(SNAPSHOT_DIR)
+        return _default_archive.store(url, html, kind)
+    except Exception as e:
+        logger.warning(f"Could not archive snapshot of {url}: {str(e)}")
+        return None
+
+
+def extract_menu_cards(html):
+    """Menu listing -> [{'id', 'name', 'image_url', 'badge', 'price'}]"""
+    from menu_parser import parse_menu_cards
+
+    return [card._asdict() for card in parse_menu_cards(html)]
+
+
+def extract_product_fields(html):
+    """Product page -> badge/price/description/ingredients, using the live scraper's selectors
+
+    A static-HTML approximation of EXTRACT_PRODUCT_INFO_JS: element visibility
+    can't be known without a browser, so hidden elements are included.
+    """
+    from bs4 import BeautifulSoup
+    from scrap_detail import DESCRIPTION_SELECTORS, INGREDIENT_KEYWORDS, PRICE_SELECTORS
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    def first_text(selectors, accept):
+        for selector in selectors:
+            for element in soup.select(selector):
+                text = element.get_text(" ", strip=True)
+                if text and accept(text):
+                    return text
+        return ""
+
+    badges = soup.select(".textbadgecontainer") or soup.select(".badge, .tag, .label, [class*='badge'], [class*='tag']")
+    price = first_text(PRICE_SELECTORS, lambda text: (
+        "₿" in text or "บาท" in text or text.replace(".", "").replace(",", "").isdigit()
+    ))
+    ingredients = ""
+    for keyword in INGREDIENT_KEYWORDS:
+        for string in soup.find_all(string=lambda s: s and keyword.lower() in s.lower()):
+            text = string.parent.get_text(" ", strip=True)
+            if len(text) > 10:
+                ingredients = text[:150]
+                break
+        if ingredients:
+            break
+
+    return {
+        "badge_text": " | ".join(text for text in (b.get_text(" ", strip=True) for b in badges) if text),
+        "price": price,
+        "description": first_text(DESCRIPTION_SELECTORS, lambda text: len(text) > 20)[:200],
+        "ingredients": ingredients,
+        "nutrition_info": "",
+    }
+
+
+EXTRACTORS = {
+    "menu_cards": extract_menu_cards,
+    "product_info": extract_product_fields,
+}
+
+_resolved_extractors = {}
+
+
+def resolve_extractor(spec):
+    """An EXTRACTORS name or "module:function" -> callable (cached per process)"""
+    extractor = _resolved_extractors.get(spec)
+    if extractor is None:
+        if spec in EXTRACTORS:
+            extractor = EXTRACTORS[spec]
+        else:
+            module_name, _, function_name = spec.partition(":")
+            if not function_name:
+                raise ValueError(f"Unknown extractor '{spec}'; use one of {sorted(EXTRACTORS)} or module:function")
+            extractor = getattr(importlib.import_module(module_name), function_name)
+        _resolved_extractors[spec] = extractor
+    return extractor
+
+
+def _extract_object(job):
+    """Worker-process entry point: (root, digest, spec) -> (digest, result, error)"""
+    root, digest, spec = job
+    try:
+        return digest, resolve_extractor(spec)(read_object(root, digest)), None
+    except Exception as e:
+        return digest, None, f"{type(e).__name__}: {str(e)}"
+
+
+def reextract(archive, extractor, workers=SNAPSHOT_WORKERS, **filters):
+    """Yield index rows with 'result' (or 'error') from running extractor over matching snapshots
+
+    Each distinct object is decompressed and extracted once, in a pool of
+    worker processes, however many index rows point at it.
+    """
+    resolve_extractor(extractor)  # fail fast on a bad spec
+    rows = archive.snapshots(**filters)
+    digests = list(dict.fromkeys(row["digest"] for row in rows))
+    jobs = [(archive.root, digest, extractor) for digest in digests]
+
+    results = {}
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            digest, result, error = _extract_object(job)
+            results[digest] = (result, error)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            for digest, result, error in executor.map(_extract_object, jobs, chunksize=chunksize):
+                results[digest] = (result, error)
+
+    for row in rows:
+        result, error = results[row["digest"]]
+        yield dict(row, result=result) if error is None else dict(row, error=error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=SNAPSHOT_DIR or "kfc_snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="print the index")
+    list_parser.add_argument("url_prefix", nargs="?")
+    list_parser.add_argument("--kind")
+
+    reextract_parser = commands.add_parser("reextract", help="run an extractor over stored snapshots (JSON lines)")
+    reextract_parser.add_argument("extractor", help=f"one of {sorted(EXTRACTORS)} or module:function")
+    reextract_parser.add_argument("--url-prefix")
+    reextract_parser.add_argument("--kind")
+    reextract_parser.add_argument("--since", type=float, help="unix timestamp")
+    reextract_parser.add_argument("--until", type=float, help="unix timestamp")
+    reextract_parser.add_argument("--workers", type=int, default=SNAPSHOT_WORKERS)
+    args = parser.parse_args()
+
+    archive = SnapshotArchive(args.root)
+    if args.command == "list":
+        for row in archive.snapshots(url_prefix=args.url_prefix, kind=args.kind):
+            fetched = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["fetched_at"]))
+            print(f"{fetched}  {row['kind']:8} {row['size'] / 1024:8.0f} KB  {row['digest'][:12]}  {row['url']}")
+        return
+
+    started = time.perf_counter()
+    count = errors = 0
+    for row in reextract(archive, args.extractor, workers=args.workers, url_prefix=args.url_prefix,
+                         kind=args.kind, since=args.since, until=args.until):
+        count += 1
+        errors += "error" in row
+        print(json.dumps(row, ensure_ascii=False))
+    print(f"✅ Re-extracted {count} snapshots ({errors} errors) in {time.perf_counter() - started:.1f}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
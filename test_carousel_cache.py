@@ -0,0 +1,44 @@
+"""Checks that prebuilt menu carousels stay within LINE's message limits
+
+    python -m pytest test_carousel_cache.py
+"""
+import csv
+
+import pytest
+
+from carousel_cache import MAX_LABEL_LENGTH, MENU_PAGE_SIZE, CarouselCache, parse_menu_request
+from menu_catalog import MenuCatalog
+
+# linebot's v2 models warn about a deprecated helper on every as_json_dict()
+pytestmark = pytest.mark.filterwarnings("ignore:Call to deprecated")
+
+
+@pytest.fixture(params=[9, 95, 160])
+def catalog(request, tmp_path):
+    path = tmp_path / "kfc_menu.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Menu Item", "Image URL", "Product ID"])
+        for number in range(request.param):
+            writer.writerow([f"Product {number}", f"https://images.ctfassets.net/x/{number}.png", f"CAT-{number}"])
+    return MenuCatalog(str(path))
+
+
+def test_pages_fit_line_limits(catalog):
+    pages = CarouselCache(catalog).pages()
+    assert len(pages) == -(-len(catalog.items()) // MENU_PAGE_SIZE)
+
+    for number, page in enumerate(pages, 1):
+        message = page.as_json_dict()
+        columns = message["template"]["columns"]
+        assert 0 < len(columns) <= MENU_PAGE_SIZE
+        for column in columns:
+            assert all(len(action["label"]) <= MAX_LABEL_LENGTH for action in column["actions"])
+
+        quick_reply = message.get("quickReply")
+        if number == len(pages):
+            assert quick_reply is None
+            continue
+        action = quick_reply["items"][0]["action"]
+        assert len(action["label"]) <= MAX_LABEL_LENGTH, action["label"]
+        assert parse_menu_request(action["data"]) == number + 1
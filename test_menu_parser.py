@@ -0,0 +1,67 @@
+"""Regression tests for menu_parser against the saved kfc_menu_page.html
+
+    python -m pytest test_menu_parser.py
+"""
+import os
+
+import pytest
+
+from menu_parser import parse_menu_cards, parse_menu_cards_file, parse_price
+
+MENU_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kfc_menu_page.html")
+
+
+@pytest.fixture(scope="module")
+def html():
+    with open(MENU_PAGE, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def cards(html):
+    return parse_menu_cards(html)
+
+
+def card_markup(html, card_id):
+    """The saved page's markup from this card's id up to the next card"""
+    start = html.find(f'id="{card_id}"')
+    assert start != -1
+    end = html.find('class="plp-item-card', start + 1)
+    return html[start:end if end != -1 else len(html)]
+
+
+def test_cards_have_unique_ids(cards):
+    ids = [card.id for card in cards]
+    assert len(ids) == 91
+    assert len(set(ids)) == len(ids)
+    assert all(card.name for card in cards)
+
+
+def test_cards_without_an_image_keep_an_empty_url(html, cards):
+    without = [card for card in cards if "small-menu-product-image" not in card_markup(html, card.id)]
+    assert without, "the saved page should include lazy-loaded cards without an image"
+    assert all(card.image_url == "" for card in without)
+
+
+def test_each_image_comes_from_its_own_card(html, cards):
+    with_images = [card for card in cards if card.image_url]
+    assert with_images
+    for card in with_images:
+        assert card.image_url in card_markup(html, card.id), card.id
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000, 64 * 1024])
+def test_chunked_file_parse_matches_whole_page(cards, chunk_size):
+    assert parse_menu_cards_file(MENU_PAGE, chunk_size=chunk_size) == cards
+
+
+@pytest.mark.parametrize("text, price", [
+    ("฿ 399", 399.0),
+    ("THB 1,099.00", 1099.0),
+    ("399 บาท", 399.0),
+    ("199.-", 199.0),
+    ("640 KJ", None),
+    ("", None),
+])
+def test_parse_price(text, price):
+    assert parse_price(text) == price
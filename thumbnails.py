@@ -0,0 +1,94 @@
+"""Carousel-sized JPEG variants of the Contentful product images
+
+The crawlers store the original image URL with its resize parameters
+stripped, so LINE clients were sent full-size PNGs. Contentful's Images API
+renders any width/format on request, so a thumbnail is the original URL plus
+a query string. When KFC_THUMBNAIL_DIR is set the crawler also downloads each
+variant once into that directory under a content-addressed name, and the
+Flask app serves it from /thumbnails/ with a one-year immutable cache header
+(LINE needs an HTTPS URL: set PUBLIC_BASE_URL to the bot's public origin).
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# LINE shows carousel thumbnails at most ~1024 px wide and accepts only JPEG or
+# PNG (not WebP); 600 px JPEG looks sharp on phones at a fraction of the PNG size
+THUMBNAIL_WIDTH = int(os.environ.get("KFC_THUMBNAIL_WIDTH", "600"))
+PREVIEW_WIDTH = 240
+THUMBNAIL_QUALITY = int(os.environ.get("KFC_THUMBNAIL_QUALITY", "75"))
+
+THUMBNAIL_DIR = os.environ.get("KFC_THUMBNAIL_DIR", "")
+PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL", "").rstrip("/")
+THUMBNAIL_ROUTE = "/thumbnails"
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600
+
+CONTENTFUL_IMAGE_HOST = "images.ctfassets.net"
+
+
+def thumbnail_url(image_url, width=THUMBNAIL_WIDTH, quality=THUMBNAIL_QUALITY):
+    """Contentful URL for a progressive JPEG `width` px wide; other hosts are returned unchanged"""
+    if not image_url:
+        return ""
+    parsed = urlparse(image_url)
+    if parsed.hostname != CONTENTFUL_IMAGE_HOST:
+        return image_url
+    query = urlencode({"w": width, "fm": "jpg", "fl": "progressive", "q": quality})
+    return parsed._replace(query=query).geturl()
+
+
+def thumbnail_filename(url):
+    """Content-addressed file name for a thumbnail URL (the URL includes the size)"""
+    return f"{hashlib.sha1(url.encode('utf-8')).hexdigest()[:20]}.jpg"
+
+
+def public_thumbnail_url(filename):
+    """URL LINE should load a locally cached thumbnail from, or "" if it isn't publicly served"""
+    if not (filename and PUBLIC_BASE_URL):
+        return ""
+    return f"{PUBLIC_BASE_URL}{THUMBNAIL_ROUTE}/{filename}"
+
+
+def cache_thumbnail(url, directory=THUMBNAIL_DIR, session=None, timeout=15):
+    """Download url into directory once; returns the file name"""
+    filename = thumbnail_filename(url)
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        return filename
+    response = (session or requests).get(url, timeout=timeout)
+    response.raise_for_status()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp_path, path)
+    return filename
+
+
+def add_thumbnails(products, directory=THUMBNAIL_DIR, workers=8):
+    """Crawler stage: set thumbnail_url (and thumbnail_file when caching locally) on each product dict"""
+    for product in products:
+        product["thumbnail_url"] = thumbnail_url(product.get("image_url"))
+        product["thumbnail_file"] = ""
+    if not directory:
+        return products
+
+    os.makedirs(directory, exist_ok=True)
+    session = requests.Session()
+
+    def fetch(product):
+        try:
+            product["thumbnail_file"] = cache_thumbnail(product["thumbnail_url"], directory, session)
+        except (requests.RequestException, OSError) as e:
+            logger.warning(f"Could not cache thumbnail for {product.get('name')}: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fetch, [p for p in products if p["thumbnail_url"]]))
+    cached = sum(1 for p in products if p["thumbnail_file"])
+    logger.info(f"Cached {cached} thumbnails in '{directory}'")
+    return products
@@ -1,149 +1,114 @@
-from flask import Flask, request, abort
-from linebot import LineBotApi, WebhookHandler
-from linebot.exceptions import InvalidSignatureError
-from linebot.models import MessageEvent, TextMessage, TextSendMessage
-import time
-from bs4 import BeautifulSoup
-from selenium import webdriver
-import chromedriver_autoinstaller
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from urllib.parse import urlparse
-from linebot.models import (
-    TextMessage, TextSendMessage, TemplateSendMessage,
-    CarouselTemplate, CarouselColumn, MessageEvent , URIAction
-)
-app = Flask(__name__)
-
-# Your LINE Channel Secret and Access Token
-CHANNEL_SECRET = 'XXX'
-CHANNEL_ACCESS_TOKEN = 'XXX'
-
-line_bot_api = LineBotApi(CHANNEL_ACCESS_TOKEN)
-handler = WebhookHandler(CHANNEL_SECRET)
-
-# Webhook endpoint for LINE to call
-@app.route("/", methods=['POST'])
-def callback():
-    # Get X-Line-Signature header value
-    signature = request.headers['X-Line-Signature']
-
-    # Get request body as text
-    body = request.get_data(as_text=True)
-
-    try:
-        # Handle the webhook event
-        handler.handle(body, signature)
-    except InvalidSignatureError:
-        abort(400)
-
-    return 'OK'
-
-# Event handler for text messages
-@handler.add(MessageEvent, message=TextMessage)
-def handle_message(event):
-    if event.message.text.lower() == "menu":
-        url = "https://www.kfc.co.th/menu/meals"
-        result = fetch_kfc_menu(url)
-
-        # Build a carousel message if data exists
-        if result["menu_items"] and result["image_urls"]:
-            columns = []
-            for title, image_url in zip(result["menu_items"], result["image_urls"]):
-                # LINE Carousel image limit is 12 columns
-                if len(columns) >= 12:
-                    break
-                column = CarouselColumn(
-                    thumbnail_image_url=image_url,
-                    title=(title[:40] if len(title) > 40 else title),  # Max 40 characters
-                    text="เลือกเพื่อดูรายละเอียด",
-                    actions=[
-    URIAction(label="ดูเมนู", uri="https://www.kfc.co.th/menu/meals")
-]
-                )
-                columns.append(column)
-
-            carousel_template = CarouselTemplate(columns=columns)
-            template_message = TemplateSendMessage(
-                alt_text="KFC Menu",
-                template=carousel_template
-            )
-            line_bot_api.reply_message(event.reply_token, template_message)
-        else:
-            line_bot_api.reply_message(
-                event.reply_token,
-                TextSendMessage(text="ขออภัย ไม่สามารถดึงเมนูได้ในขณะนี้")
-            )
-    else:
-        line_bot_api.reply_message(
-            event.reply_token,
-            TextSendMessage(text="กรุณาพิมพ์ 'menu' เพื่อดูเมนู KFC")
-        )
-
-def fetch_kfc_menu(url):
-    # Auto-install compatible ChromeDriver
-    chromedriver_autoinstaller.install()
-    # Setup Chrome options (uncomment headless if you want no browser UI)
-    chrome_options = webdriver.ChromeOptions()
-    # chrome_options.add_argument('--headless')  # Uncomment to run in headless mode
-    # Initialize the WebDriver
-    driver = webdriver.Chrome(options=chrome_options)
-
-    # Open the URL
-    driver.get(url)
-
-    # Wait for page JS to load (adjust if needed)
-    time.sleep(5)
-
-    # Try to accept cookies by clicking the button
-    try:
-        wait = WebDriverWait(driver, 10)
-        accept_btn = wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
-        accept_btn.click()
-        print("Clicked the accept cookies button.")
-    except Exception as e:
-        print("Button not found or not clickable:", e)
-
-    # Save the page HTML to a variable
-    html = driver.page_source
-
-    # Parse the HTML with BeautifulSoup
-    soup = BeautifulSoup(html, 'html.parser')
-
-    # Find all divs with class 'small-menu-product-header'
-    headers = soup.find_all("div", class_="small-menu-product-header")
-
-    # Initialize a list for menu items
-    menu_items = []
-
-    for header in headers:
-        menu_item = header.get_text(strip=True)
-        menu_items.append(menu_item)
-
-    # Find all img tags with class 'false small-menu-product-image'
-    images = soup.find_all("img", class_="false small-menu-product-image")
-
-    # Initialize a list for image URLs
-    image_urls = []
-
-    for img in images:
-        img_url = img.get("src")
-        parsed_url = urlparse(img_url)
-        base_url = parsed_url._replace(query="").geturl()
-        image_urls.append(base_url)
-
-    # Close the browser
-    driver.quit()
-
-    # Prepare the result as a dictionary
-    result = {
-        "menu_items": menu_items,
-        "image_urls": image_urls
-    }
-
-    return result
-
-if __name__ == "__main__":
-    app.run(port=5000)
-
+from flask import Flask
+from linebot.models import TextSendMessage
+import time
+from carousel_cache import MENU_PAGE_SIZE, build_menu_page, parse_menu_request
+from menu_catalog import MenuItem
+from menu_parser import parse_menu_cards
+from thumbnails import thumbnail_url
+from line_client import LineClient
+from line_webhook import LineWebhook
+from linebot.models import URIAction
+app = Flask(__name__)
+
+# Your LINE Channel Secret and Access Token
+CHANNEL_SECRET = 'XXX'
+CHANNEL_ACCESS_TOKEN = 'XXX'
+
+# Pooled keep-alive Messaging API client (retries 429/5xx within the reply token lifetime)
+line_client = LineClient(CHANNEL_ACCESS_TOKEN)
+
+def reply_menu_page(event, page):
+    """Scrape the menu and reply with one carousel page ("menu", "menu 2", ...)"""
+    # Follows KFC_BASE_URL, so load tests hit kfc_standin instead of the live site
+    from scrap_detail import MENU_URL as url
+
+    items = [
+        MenuItem(card.name, card.image_url, thumbnail_url(card.image_url))
+        for card in fetch_kfc_menu(url) if card.image_url
+    ]
+    if not items:
+        line_client.reply_to(
+            event,
+            TextSendMessage(text="ขออภัย ไม่สามารถดึงเมนูได้ในขณะนี้")
+        )
+        return "error"
+
+    # LINE carousels take at most MENU_PAGE_SIZE columns; later pages are offered as a quick reply
+    page_count = (len(items) + MENU_PAGE_SIZE - 1) // MENU_PAGE_SIZE
+    if page > page_count:
+        line_client.reply_to(event, TextSendMessage(text=f"เมนูมีทั้งหมด {page_count} หน้า"))
+        return "menu"
+    chunk = items[(page - 1) * MENU_PAGE_SIZE:page * MENU_PAGE_SIZE]
+    line_client.reply_to(event, build_menu_page(
+        chunk, page, page_count,
+        text="เลือกเพื่อดูรายละเอียด",
+        action=lambda item: URIAction(label="ดูเมนู", uri=url)
+    ))
+    return "menu"
+
+# Handle "more" buttons under the menu carousel
+def handle_postback(event):
+    menu_page = parse_menu_request(event.postback.data)
+    if menu_page is not None:
+        return reply_menu_page(event, menu_page)
+
+# Event handler for text messages
+def handle_message(event):
+    menu_page = parse_menu_request(event.message.text)
+    if menu_page is not None:
+        return reply_menu_page(event, menu_page)
+    else:
+        line_client.reply_to(
+            event,
+            TextSendMessage(text="กรุณาพิมพ์ 'menu' เพื่อดูเมนู KFC")
+        )
+        return "help"
+
+def fetch_kfc_menu(url):
+    # Selenium is only needed here; keep it out of webhook startup
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from scrap_detail import chrome_service
+
+    # Setup Chrome options (uncomment headless if you want no browser UI)
+    chrome_options = webdriver.ChromeOptions()
+    # chrome_options.add_argument('--headless')  # Uncomment to run in headless mode
+    # Initialize the WebDriver; ChromeDriver is resolved once per process (or taken from CHROMEDRIVER_PATH)
+    driver = webdriver.Chrome(service=chrome_service(), options=chrome_options)
+
+    # Open the URL
+    driver.get(url)
+
+    # Wait for page JS to load (adjust if needed)
+    time.sleep(5)
+
+    # Try to accept cookies by clicking the button
+    try:
+        wait = WebDriverWait(driver, 10)
+        accept_btn = wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
+        accept_btn.click()
+        print("Clicked the accept cookies button.")
+    except Exception as e:
+        print("Button not found or not clickable:", e)
+
+    # Save the page HTML to a variable
+    html = driver.page_source
+
+    # One record per product card, so each title keeps its own image
+    cards = parse_menu_cards(html)
+
+    # Close the browser
+    driver.quit()
+
+    return cards
+
+# Signed webhook callback plus /queue and /metrics; events are handled on LINE_EVENT_WORKERS threads
+line_webhook = LineWebhook(CHANNEL_SECRET, handle_message, handle_postback)
+line_webhook.register(app)
+
+# Development server; in production run `gunicorn webhook:app` (see gunicorn.conf.py)
+if __name__ == "__main__":
+    app.run(port=5000)
+
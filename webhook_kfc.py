@@ -1,127 +1,349 @@
-from flask import Flask, request, abort
-from linebot import LineBotApi, WebhookHandler
-from linebot.exceptions import InvalidSignatureError
-from linebot.models import (
-    MessageEvent, TextMessage, TextSendMessage,
-    TemplateSendMessage, CarouselTemplate, CarouselColumn, URIAction, MessageAction
-)
-import csv
-from scrap_detail import open_product_page_by_name_and_get_badge
-from bs4 import BeautifulSoup
-
-app = Flask(__name__)
-
-# Your LINE Channel Secret and Access Token
-CHANNEL_SECRET = 'xxx'
-CHANNEL_ACCESS_TOKEN = 'xxx'
-
-
-
-line_bot_api = LineBotApi(CHANNEL_ACCESS_TOKEN)
-handler = WebhookHandler(CHANNEL_SECRET)
-
-# Webhook
-@app.route("/", methods=['POST'])
-def callback():
-    signature = request.headers['X-Line-Signature']
-    body = request.get_data(as_text=True)
-
-    try:
-        handler.handle(body, signature)
-    except InvalidSignatureError:
-        abort(400)
-
-    return 'OK'
-
-# Load KFC menu from CSV
-def fetch_kfc_menu_from_csv(csv_path="kfc_menu.csv"):
-    menu_items = []
-
-    try:
-        with open(csv_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                name = row.get("Menu Item")
-                image = row.get("Image URL")
-                if name and image:
-                    menu_items.append({
-                        "name": name,
-                        "image_url": image
-                    })
-    except FileNotFoundError:
-        print(f"⚠️ CSV file '{csv_path}' not found.")
-
-    return menu_items
-def format_badge_text(badge_html):
-    soup = BeautifulSoup(badge_html, 'html.parser')
-    
-    # ลบ HTML tags ที่ไม่จำเป็น
-    text = soup.get_text(separator=" ", strip=True)
-    
-    # จำกัดความยาวของข้อความ (หากข้อความยาวเกินไป)
-    if len(text) > 1000:
-        text = text[:1000] + "..."
-
-    return text
-# Handle messages
-@handler.add(MessageEvent, message=TextMessage)
-def handle_message(event):
-    user_message = event.message.text.strip()
-    print(f"DEBUG: Received message: {user_message}")
-
-    if user_message.lower() == "menu":
-        menu_data = fetch_kfc_menu_from_csv()
-
-        if not menu_data:
-            line_bot_api.reply_message(
-                event.reply_token,
-                TextSendMessage(text="⚠️ No menu data found.")
-            )
-            return
-
-        menu_data = menu_data[:10]
-
-        carousel_columns = []
-        for item in menu_data:
-            carousel_columns.append(
-                CarouselColumn(
-                    thumbnail_image_url=item["image_url"],
-                    title=item["name"][:40],
-                    text="เมนูแนะนำจาก KFC 🍗",
-                    actions=[MessageAction(label="ดูรายละเอียด", text=item["name"])]
-                )
-            )
-
-        template_message = TemplateSendMessage(
-            alt_text="KFC Menu",
-            template=CarouselTemplate(columns=carousel_columns)
-        )
-
-        line_bot_api.reply_message(event.reply_token, template_message)
-
-    else:
-        # Assume user_message is a product name; scrape and reply badge info
-        try:
-            badge_html, driver = open_product_page_by_name_and_get_badge(user_message)
-            driver.quit()  # Close browser after scraping
-
-            # ใช้ฟังก์ชัน format_badge_text เพื่อจัดรูปแบบข้อความ
-            badge_text = format_badge_text(badge_html)
-            print(f"DEBUG: Processing product: {user_message}") 
-            reply_text = f"ข้อมูลเมนู: {user_message}\n{badge_text}"
-            print(f"DEBUG: Reply text: {reply_text}")
-            
-            line_bot_api.reply_message(
-                event.reply_token,
-                TextSendMessage(text=reply_text)
-            )
-        except Exception as e:
-            line_bot_api.reply_message(
-                event.reply_token,
-                TextSendMessage(text=f"ไม่พบเมนู '{user_message}' หรือเกิดข้อผิดพลาด: {str(e)}")
-            )
-
-if __name__ == "__main__":
-    app.run(port=5000)
-
-
+from flask import Flask, abort, jsonify, send_from_directory
+from linebot.models import (
+    TextSendMessage, ImageSendMessage, MessageAction, QuickReply, QuickReplyButton
+)
+import os
+import time
+from product_store import default_store
+from line_client import LineClient
+from line_webhook import EVENT_WORKERS, LineWebhook
+from menu_catalog import MenuCatalog
+from carousel_cache import MENU_PAGE_SIZE, CarouselCache, build_result_carousel, parse_menu_request
+from menu_attributes import is_filtered, parse_query
+from name_index import normalize_search_text
+from single_flight import SingleFlight
+from detail_cache import DetailCache
+from admission import AdmissionControl, Overloaded, UserRateLimiter
+from thumbnails import PREVIEW_WIDTH, THUMBNAIL_DIR, THUMBNAIL_MAX_AGE, THUMBNAIL_ROUTE, thumbnail_url
+from metrics import REGISTRY
+
+app = Flask(__name__)
+
+# Your LINE Channel Secret and Access Token
+CHANNEL_SECRET = 'xxx'
+CHANNEL_ACCESS_TOKEN = 'xxx'
+
+
+
+# Pooled keep-alive Messaging API client (retries 429/5xx within the reply token lifetime)
+line_client = LineClient(CHANNEL_ACCESS_TOKEN)
+
+# Menu loaded once at startup; reloaded automatically when the crawler rewrites the CSV
+menu_catalog = MenuCatalog()
+
+# Carousel pages rendered once per catalog version
+carousel_cache = CarouselCache(menu_catalog)
+
+# Concurrent live scrapes of the same product share one browser session
+scrape_flight = SingleFlight()
+
+# Live-scraped details: in-memory LRU over SQLite, served stale while refreshing
+detail_cache = DetailCache()
+
+# Crawled product details (build with `python product_store.py`)
+product_store = default_store()
+
+# At most KFC_MAX_LIVE_SCRAPES live scrapes at once and KFC_SCRAPE_QUEUE_SIZE waiting
+# (for up to KFC_SCRAPE_QUEUE_TIMEOUT seconds); anything beyond gets a busy reply.
+# Waiting scrapes block event workers, so the wait queue is capped to leave at least
+# one worker free for menu/store replies; otherwise those pile up in event_queue.
+MAX_LIVE_SCRAPES = int(os.environ.get("KFC_MAX_LIVE_SCRAPES", "2"))
+SCRAPE_QUEUE_SIZE = min(
+    int(os.environ.get("KFC_SCRAPE_QUEUE_SIZE", "8")),
+    max(0, EVENT_WORKERS - MAX_LIVE_SCRAPES - 1)
+)
+SCRAPE_QUEUE_TIMEOUT = float(os.environ.get("KFC_SCRAPE_QUEUE_TIMEOUT", "15"))
+scrape_admission = AdmissionControl(MAX_LIVE_SCRAPES, SCRAPE_QUEUE_SIZE, SCRAPE_QUEUE_TIMEOUT)
+
+# Reply tokens stop working about a minute after the event. A live scrape that
+# can't start within KFC_SCRAPE_MAX_EVENT_AGE seconds of the event (time spent in
+# event_queue included) gets the busy reply instead of a reply that would fail.
+SCRAPE_MAX_EVENT_AGE = float(os.environ.get("KFC_SCRAPE_MAX_EVENT_AGE", "20"))
+
+# Each user gets KFC_USER_SCRAPE_BURST live lookups, refilled at KFC_USER_SCRAPE_RATE per second
+USER_SCRAPE_RATE = float(os.environ.get("KFC_USER_SCRAPE_RATE", "0.2"))
+USER_SCRAPE_BURST = int(os.environ.get("KFC_USER_SCRAPE_BURST", "3"))
+user_limiter = UserRateLimiter(USER_SCRAPE_RATE, USER_SCRAPE_BURST)
+
+# Once the store's crawl listed every menu category, text whose trigram similarity to
+# every product name is below KFC_MIN_PRODUCT_SCORE is not looked up on the live site
+MIN_PRODUCT_SCORE = float(os.environ.get("KFC_MIN_PRODUCT_SCORE", "0.2"))
+
+BUSY_TEXT = "⏳ ขณะนี้มีผู้ใช้งานจำนวนมาก กรุณาลองใหม่อีกครั้งในอีกสักครู่"
+THROTTLED_TEXT = "⏳ คุณค้นหาเมนูถี่เกินไป กรุณารอสักครู่แล้วลองใหม่"
+NOT_FOUND_TEXT = "ไม่พบเมนู '{name}' ในระบบ"
+
+REGISTRY.gauge("kfc_scrapes_in_flight", "Products currently being live-scraped", scrape_flight.in_flight)
+REGISTRY.gauge("kfc_detail_cache_hit_ratio", "Detail cache hit ratio since start", lambda: detail_cache.stats()["hit_ratio"])
+REGISTRY.gauge("kfc_admission_in_flight", "Live scrapes holding an admission slot", scrape_admission.in_flight)
+REGISTRY.gauge("kfc_admission_waiting", "Live scrapes waiting for an admission slot", scrape_admission.waiting)
+
+def preload():
+    """Load the catalog, carousel pages and product name/attribute indexes up front
+
+    gunicorn.conf.py calls this in the master before forking (and again on
+    reload), so workers start with them built and share the memory.
+    """
+    menu_catalog.snapshot()
+    carousel_cache.pages()
+    product_store.name_index()
+    product_store.attribute_index()
+
+# How many live scrapes were coalesced by product name
+@app.route("/lookups", methods=['GET'])
+def lookup_stats():
+    return jsonify({
+        "single_flight": scrape_flight.stats(),
+        "detail_cache": detail_cache.stats(),
+        "admission": scrape_admission.stats(),
+        "user_limiter": user_limiter.stats(),
+    })
+
+# Thumbnails cached by the crawler (KFC_THUMBNAIL_DIR); names are content-addressed, so never revalidate
+@app.route(f"{THUMBNAIL_ROUTE}/<path:filename>", methods=['GET'])
+def thumbnail(filename):
+    if not THUMBNAIL_DIR:
+        abort(404)
+    response = send_from_directory(THUMBNAIL_DIR, filename, max_age=THUMBNAIL_MAX_AGE)
+    response.headers["Cache-Control"] = f"public, max-age={THUMBNAIL_MAX_AGE}, immutable"
+    return response
+
+def format_badge_text(badge_html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(badge_html, 'html.parser')
+    
+    # ลบ HTML tags ที่ไม่จำเป็น
+    text = soup.get_text(separator=" ", strip=True)
+    
+    # จำกัดความยาวของข้อความ (หากข้อความยาวเกินไป)
+    if len(text) > 1000:
+        text = text[:1000] + "..."
+
+    return text
+def reply_menu_page(event, page):
+    """Reply with a prebuilt carousel page ("menu", "menu 2", ...)"""
+    if not carousel_cache.pages():
+        line_client.reply_to(
+            event,
+            TextSendMessage(text="⚠️ No menu data found.")
+        )
+        return
+
+    message = carousel_cache.page(page)
+    if message is None:
+        line_client.reply_to(
+            event,
+            TextSendMessage(text=f"เมนูมีทั้งหมด {len(carousel_cache.pages())} หน้า")
+        )
+        return
+
+    line_client.reply_to(event, message)
+
+def detail_messages(product_name, reply_text):
+    """Product image (when the catalog has one) plus the detail text, sent as one reply"""
+    messages = []
+    item = menu_catalog.find(product_name)
+    if item:
+        messages.append(ImageSendMessage(
+            # Contentful resizes on the fly: a full-screen JPEG instead of the source PNG, and a small preview
+            original_content_url=thumbnail_url(item.image_url, width=1024),
+            preview_image_url=thumbnail_url(item.image_url, width=PREVIEW_WIDTH)
+        ))
+    messages.append(TextSendMessage(
+        text=reply_text,
+        quick_reply=QuickReply(items=[QuickReplyButton(action=MessageAction(label="📋 ดูเมนู", text="menu"))])
+    ))
+    return messages
+
+def describe_attributes(attributes):
+    """Short carousel caption such as "฿399 · 8 ชิ้น · fries, drink" """
+    parts = []
+    if attributes.price is not None:
+        parts.append(f"฿{attributes.price:,.0f}")
+    if attributes.pieces:
+        parts.append(f"{attributes.pieces} ชิ้น")
+    if attributes.sides:
+        parts.append(", ".join(attributes.sides))
+    return " · ".join(parts) or "เมนูแนะนำจาก KFC 🍗"
+
+def answer_filter_query(event, user_message):
+    """Reply to "buckets under 400", "rice bowl", ... from the attribute index; False if it isn't one
+
+    Exact product names are left to the detail lookup. So is any name the
+    name index resolves ("pepsi", "nuggets") unless the text filters by
+    price, pieces or sides or just names a category ("buckets", "rice bowl"),
+    and so are unfiltered queries that match nothing (likely a misspelt name).
+    """
+    query = parse_query(user_message)
+    if query is None:
+        return False
+    filtered = is_filtered(query)
+    match = product_store.name_index().resolve(user_message)
+    if match and (match.score == 1.0 or not (filtered or query.browse)):
+        return False
+
+    entries = product_store.attribute_index().search(query, limit=MENU_PAGE_SIZE)
+    if not entries:
+        if not filtered:
+            return False
+        line_client.reply_to(event, TextSendMessage(
+            text=f"ไม่พบเมนูที่ตรงกับ '{user_message}'",
+            quick_reply=QuickReply(items=[QuickReplyButton(action=MessageAction(label="📋 ดูเมนู", text="menu"))])
+        ))
+        return True
+
+    results = []
+    for entry in entries:
+        name = entry.record["name"]
+        item = menu_catalog.find(name)
+        results.append((name, item.thumbnail_url if item else "", describe_attributes(entry.attributes)))
+    line_client.reply_to(event, build_result_carousel(results, f"KFC: {user_message}"))
+    return True
+
+def is_not_a_product(text):
+    """True for text that can't be a product name ("hello"), so it gets no live scrape
+
+    Only decided when the store lists every menu category; names the menu
+    catalog has, or text somewhat like a stored name (typos, new products),
+    still get the live lookup.
+    """
+    if not product_store.is_complete() or menu_catalog.find(text):
+        return False
+    return product_store.name_index().similarity(text) < MIN_PRODUCT_SCORE
+
+def detail_cache_key(product_name):
+    """Cache by product id when the name index knows the product, else by normalized name"""
+    match = product_store.name_index().resolve(product_name)
+    if match:
+        return f"id:{match.product_id}"
+    return f"name:{normalize_search_text(product_name)}"
+
+def scrape_deadline(event):
+    """time.time() by which a live scrape for this event must have started"""
+    timestamp = getattr(event, "timestamp", None)
+    sent_at = timestamp / 1000 if timestamp else time.time()
+    return sent_at + SCRAPE_MAX_EVENT_AGE
+
+def fetch_product_details(product_name, deadline=None):
+    """Formatted details for a product that is not in the crawled store
+
+    Goes through the two-tier cache; misses and stale refreshes run a live
+    scrape on a warm pooled browser, coalesced per product so concurrent users
+    share one scrape. Raises ScrapeError when the site can't be scraped (or
+    the detail page has nothing to extract) and nothing is cached, or Overloaded when admission control sheds the scrape
+    (including when it can't start before deadline).
+    """
+    # Selenium loads on the first live lookup, not at startup
+    from scrap_detail import open_product_page_by_name_and_get_badge
+
+    key = detail_cache_key(product_name)
+
+    def scrape():
+        formatted_info, _ = scrape_flight.do(
+            key,
+            lambda: scrape_admission.run(
+                lambda: open_product_page_by_name_and_get_badge(product_name, raise_errors=True),
+                deadline=deadline
+            )
+        )
+        return formatted_info
+
+    return detail_cache.get(key, scrape)
+
+# Handle "more" buttons under the menu carousel
+def handle_postback(event):
+    menu_page = parse_menu_request(event.postback.data)
+    if menu_page is not None:
+        reply_menu_page(event, menu_page)
+        return "menu"
+
+# Handle messages
+def handle_message(event):
+    user_message = event.message.text.strip()
+    print(f"DEBUG: Received message: {user_message}")
+
+    menu_page = parse_menu_request(user_message)
+    if menu_page is not None:
+        reply_menu_page(event, menu_page)
+        return "menu"
+
+    else:
+        # Filtered queries are answered from the attribute index without scraping
+        if answer_filter_query(event, user_message):
+            return "filter"
+
+        # Answer from the crawled store first; only unknown names hit the live site
+        record = product_store.resolve(user_message)
+        if record:
+            line_client.reply_to(
+                event,
+                detail_messages(record['name'], f"ข้อมูลเมนู: {record['name']}\n{format_badge_text(record['formatted'])}")
+            )
+            return "store"
+
+        # Text like "hello" or "thanks" is answered at once instead of holding a browser
+        # and an admission slot on a menu search; anything that may be a product is scraped
+        if is_not_a_product(user_message):
+            line_client.reply_to(event, TextSendMessage(
+                text=NOT_FOUND_TEXT.format(name=user_message),
+                quick_reply=QuickReply(items=[QuickReplyButton(action=MessageAction(label="📋 ดูเมนู", text="menu"))])
+            ))
+            return "not_found"
+
+        from scrap_detail import ScrapeError
+
+        # Live lookups are rate limited per user; over the limit, answer from cache or ask to wait
+        user_id = getattr(event.source, "user_id", None) or "anonymous"
+        if not user_limiter.allow(user_id):
+            cached = detail_cache.peek(detail_cache_key(user_message))
+            if cached:
+                line_client.reply_to(
+                    event,
+                    detail_messages(user_message, f"ข้อมูลเมนู: {user_message}\n{format_badge_text(cached)}")
+                )
+                return "throttled_cached"
+            line_client.reply_to(event, TextSendMessage(text=THROTTLED_TEXT))
+            return "throttled"
+
+        # Assume user_message is a product name; scrape and reply badge info
+        try:
+            badge_html = fetch_product_details(user_message, deadline=scrape_deadline(event))
+
+            # ใช้ฟังก์ชัน format_badge_text เพื่อจัดรูปแบบข้อความ
+            badge_text = format_badge_text(badge_html)
+            print(f"DEBUG: Processing product: {user_message}") 
+            reply_text = f"ข้อมูลเมนู: {user_message}\n{badge_text}"
+            print(f"DEBUG: Reply text: {reply_text}")
+        except ScrapeError as e:
+            line_client.reply_to(event, TextSendMessage(text=str(e)))
+            return "error"
+        except Overloaded:
+            line_client.reply_to(event, TextSendMessage(text=BUSY_TEXT))
+            return "busy"
+        except Exception as e:
+            line_client.reply_to(
+                event,
+                TextSendMessage(text=f"ไม่พบเมนู '{user_message}' หรือเกิดข้อผิดพลาด: {str(e)}")
+            )
+            return "error"
+
+        line_client.reply_to(event, detail_messages(user_message, reply_text))
+        return "detail"
+
+# Signed webhook callback plus /queue and /metrics; events are handled on LINE_EVENT_WORKERS threads
+line_webhook = LineWebhook(CHANNEL_SECRET, handle_message, handle_postback)
+line_webhook.register(app)
+
+def warm_up_drivers():
+    """Pre-launch browsers so the first product lookup doesn't pay Chrome startup"""
+    from scrap_detail import get_driver_pool
+
+    get_driver_pool().warm_up()
+
+# Development server; in production run `gunicorn` (see gunicorn.conf.py)
+if __name__ == "__main__":
+    warm_up_drivers()
+    app.run(port=5000)
+
+